@@ -1,6 +1,9 @@
 # BACKEND: main.py 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -17,13 +20,101 @@ from routes import (
     wishlist,
     ai_stylist
 )
+from middleware.upload_limit import MULTIPART_OVERHEAD, UploadLimitMiddleware
+from services.supabase_client import SupabaseClients
+from services.database import DatabaseService
+from services.auth_service import AuthService
+from services.price_index import PriceIndex
+from services.catalog_cache import CatalogCache
+from services.cart_cache import CartCache
+from services.idempotency import IdempotencyStore
+from services.search_index import ProductSearchIndex
+from services.image_executor import ImageExecutor
+from services.improved_tryon_service import ImprovedTryOnService
+from services.huggingface_service import HuggingFaceService
+from services.tryon_router import create_tryon_router
+from services.model_monitor import ModelReadinessMonitor, parse_hours
+from services.media_store import MediaStore
+from services.tryon_cache import TryOnResultCache
+from services.job_queue import JobQueue
+from utils.config import settings
+from utils.metrics import metrics
+
+async def warm_garment_cache(app: FastAPI):
+    """Decode every product's garment in the background after startup"""
+    try:
+        products = await app.state.db.list_all_products()
+        await app.state.tryon_service.garments.warm(products)
+    except Exception as e:
+        print(f"[GARMENTS] Warm-up failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create app-scoped clients once and share them across all routers"""
+    clients = SupabaseClients()
+    app.state.supabase = clients
+    app.state.db = DatabaseService(clients)
+    app.state.auth_service = AuthService(clients)
+    app.state.price_index = PriceIndex(app.state.db)
+    app.state.catalog = CatalogCache(app.state.db)
+    app.state.catalog.add_listener(app.state.price_index.invalidate)
+    app.state.cart_cache = CartCache(app.state.db, app.state.catalog)
+    app.state.catalog.add_listener(app.state.cart_cache.on_catalog_change)
+    app.state.idempotency = IdempotencyStore()
+    app.state.search_index = ProductSearchIndex(app.state.db)
+    app.state.catalog.add_listener(app.state.search_index.on_catalog_change)
+    app.state.search_index.start()
+    app.state.image_executor = ImageExecutor(
+        settings.IMAGE_EXECUTOR,
+        workers=settings.IMAGE_WORKERS,
+        max_queued=settings.IMAGE_QUEUE_SIZE,
+        timeout=settings.IMAGE_TASK_TIMEOUT
+    )
+    app.state.tryon_service = ImprovedTryOnService(executor=app.state.image_executor)
+    app.state.catalog.add_listener(app.state.tryon_service.garments.invalidate)
+    # Shares the try-on service's HTTP pool, which it closes
+    app.state.huggingface = HuggingFaceService(http_client=app.state.tryon_service.http)
+    app.state.tryon_router = create_tryon_router(app.state.tryon_service, app.state.huggingface)
+    app.state.model_monitor = ModelReadinessMonitor(
+        app.state.tryon_service.http,
+        settings.HUGGING_FACE_API_KEY,
+        app.state.tryon_router.hosted_models() if settings.MODEL_MONITOR_ENABLED else {},
+        interval=settings.MODEL_PROBE_INTERVAL,
+        warm_interval=settings.MODEL_WARM_INTERVAL,
+        warm_hours=parse_hours(settings.MODEL_WARM_HOURS)
+    )
+    app.state.tryon_router.readiness = app.state.model_monitor
+    app.state.model_monitor.start()
+    if settings.GARMENT_WARM_ON_STARTUP:
+        warm_garments = asyncio.create_task(warm_garment_cache(app))
+    app.state.tryon_cache = TryOnResultCache(app.state.db)
+    app.state.media_store = MediaStore(app.state.db)
+    app.state.tryon_jobs = JobQueue(
+        "tryon_jobs",
+        workers=settings.TRYON_WORKERS,
+        max_queued=settings.TRYON_QUEUE_SIZE,
+        max_per_user=settings.TRYON_MAX_JOBS_PER_USER,
+        job_timeout=settings.TRYON_JOB_TIMEOUT,
+        result_ttl=settings.TRYON_JOB_TTL
+    )
+    app.state.tryon_jobs.start()
+    yield
+    await app.state.tryon_jobs.stop()
+    app.state.model_monitor.stop()
+    if settings.GARMENT_WARM_ON_STARTUP:
+        warm_garments.cancel()
+    app.state.search_index.stop()
+    await app.state.tryon_service.aclose()
+    app.state.image_executor.shutdown()
+    await clients.aclose()
 
 app = FastAPI(
     title="AI Shopping API",
     description="E-commerce API with AI Virtual Try-On & Style Consultant",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # ============================================================================
@@ -44,6 +135,12 @@ allowed_origins = [
 if FRONTEND_URL not in allowed_origins:
     allowed_origins.append(FRONTEND_URL)
 
+# Refuse oversized uploads before they are buffered
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={"/tryOn/generate": settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD}
+)
+
 # Add CORS middleware with proper configuration
 app.add_middleware(
     CORSMiddleware,
@@ -68,6 +165,11 @@ app.include_router(tryOn.router, prefix="/tryOn", tags=["Virtual Try-On"])
 app.include_router(wishlist.router, prefix="/wishlist", tags=["Wishlist"])
 app.include_router(ai_stylist.router, prefix="/ai-stylist", tags=["AI Stylist"])
 
+# Local stand-in for Storage: product image derivatives written to disk
+if settings.IMAGE_VARIANT_STORE == "local":
+    os.makedirs(settings.IMAGE_VARIANT_DIR, exist_ok=True)
+    app.mount("/media", StaticFiles(directory=settings.IMAGE_VARIANT_DIR), name="media")
+
 # ============================================================================
 # ROOT ENDPOINTS
 # ============================================================================
@@ -83,7 +185,7 @@ async def root():
     }
 
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_check(request: Request):
     return {
         "status": "healthy",
         "message": "All systems operational",
@@ -100,9 +202,16 @@ async def health_check():
             "virtual_tryon": "enabled",
             "wishlist": "enabled",
             "ai_stylist": "enabled"
-        }
+        },
+        # Last readiness check of each hosted try-on model, never probed inline
+        "models": request.app.state.model_monitor.snapshot()
     }
 
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """Counters, timings and pool gauges for capacity planning"""
+    return metrics.snapshot()
+
 # CORS preflight handler (for OPTIONS requests)
 @app.options("/{full_path:path}")
 async def options_handler(full_path: str):
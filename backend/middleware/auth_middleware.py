@@ -1,39 +1,81 @@
 from fastapi import HTTPException, Security, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from supabase import create_client, Client
-import os
+from services.auth_service import AuthService, get_auth_service
+from services.token_verifier import TokenVerifier
+from utils.cache import TTLCache
+from utils.config import settings
+import hashlib
+import time
 
 security = HTTPBearer()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+token_verifier = TokenVerifier()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
+# Validated users keyed by token hash, so raw tokens never sit in memory
+_user_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
+def _cache_ttl(claims: dict) -> float:
+    """Never cache a user beyond the expiry of the token that proved it"""
+    exp = claims.get("exp")
+    if exp is None:
+        return settings.AUTH_CACHE_TTL
+    return min(settings.AUTH_CACHE_TTL, exp - time.time())
+
+async def _verify_remotely(token: str, auth_service: AuthService) -> dict:
+    """Ask Supabase Auth to validate the token"""
+    response = await auth_service.get_user(token)
+    
+    if not response or not response.user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return {
+        "id": response.user.id,
+        "email": response.user.email,
+        "metadata": response.user.user_metadata,
+        "app_metadata": response.user.app_metadata or {}
+    }
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    auth_service: AuthService = Depends(get_auth_service)
+) -> dict:
     """
     Validate JWT token and return user information
     This replaces the unsafe user_id parameter approach
     """
     try:
         token = credentials.credentials
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
         
-        # Verify token with Supabase
-        response = supabase.auth.get_user(token)
+        user = _user_cache.get(cache_key)
+        if user is not None:
+            return user
         
-        if not response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        # Verify signature and expiry locally; None means we can't (unknown key id)
+        claims = None
+        if settings.AUTH_VERIFY_MODE == "local":
+            claims = await token_verifier.verify(token)
+        
+        if claims is not None:
+            user = {
+                "id": claims["sub"],
+                "email": claims.get("email"),
+                "metadata": claims.get("user_metadata", {}),
+                "app_metadata": claims.get("app_metadata", {})
+            }
+        else:
+            user = await _verify_remotely(token, auth_service)
+            claims = jwt.get_unverified_claims(token)
         
-        return {
-            "id": response.user.id,
-            "email": response.user.email,
-            "metadata": response.user.user_metadata
-        }
+        _user_cache.set(cache_key, user, ttl=_cache_ttl(claims))
+        return user
     
+    except HTTPException:
+        raise
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,10 +90,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
         )
 
 # Optional: Role-based access control
-async def require_role(role: str):
-    """Decorator to check user role"""
+def require_role(role: str):
+    """
+    Dependency factory to check user role
+
+    Roles come from app_metadata, which only the service role can write;
+    user_metadata is editable by the user and must never grant access.
+    """
     async def role_checker(user: dict = Depends(get_current_user)):
-        user_role = user.get("metadata", {}).get("role", "user")
+        user_role = (user.get("app_metadata") or {}).get("role", "user")
         if user_role != role and role != "user":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,47 @@
+# backend/middleware/upload_limit.py
+# ============================================================================
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Room for multipart boundaries, part headers and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Caps the request body size of upload endpoints
+
+    A request declaring a larger Content-Length is refused before any of
+    its body is read. Otherwise the body is counted as it streams in and
+    the request fails with 413 as soon as it passes the limit, so a client
+    can't make the server buffer more than the limit.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path", "").rstrip("/")) if scope["type"] == "http" else None
+        if limit is None or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload must be less than {limit // (1024 * 1024)}MB"
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -43,6 +43,8 @@ class ProductResponse(BaseModel):
     discount_price: Optional[float]
     category: str
     image_url: str
+    # {"thumbnail"|"card"|"detail": {"jpeg"|"webp": url}, "source": image_url}
+    image_variants: Optional[dict] = None
     stock_quantity: int
     rating: float
     reviews_count: int
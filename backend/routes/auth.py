@@ -1,17 +1,13 @@
 # BACKEND: routes/auth.py
 # ============================================================================
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, EmailStr
-import os
-from supabase import create_client, Client
+from services.auth_service import AuthService, get_auth_service
+from services.database import DatabaseService, get_db
 from datetime import datetime
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
 
 class RegisterRequest(BaseModel):
     email: EmailStr
@@ -29,26 +25,20 @@ class AuthResponse(BaseModel):
     access_token: str
 
 @router.post("/register", response_model=AuthResponse)
-async def register(request: RegisterRequest):
+async def register(
+    request: RegisterRequest,
+    auth_service: AuthService = Depends(get_auth_service),
+    db: DatabaseService = Depends(get_db)
+):
     try:
         # Create user in Supabase Auth
-        response = supabase.auth.sign_up({
-            "email": request.email,
-            "password": request.password,
-            "options": {
-                "data": {"name": request.name}
-            }
-        })
+        response = await auth_service.sign_up(request.email, request.password, request.name)
         
         if not response.user:
             raise HTTPException(status_code=400, detail="Registration failed")
         
         # Create profile
-        supabase.table("profiles").insert({
-            "id": response.user.id,
-            "name": request.name,
-            "created_at": datetime.utcnow().isoformat()
-        }).execute()
+        await db.create_profile(response.user.id, request.name, datetime.utcnow().isoformat())
         
         return AuthResponse(
             user_id=response.user.id,
@@ -60,25 +50,24 @@ async def register(request: RegisterRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login", response_model=AuthResponse)
-async def login(request: LoginRequest):
+async def login(
+    request: LoginRequest,
+    auth_service: AuthService = Depends(get_auth_service),
+    db: DatabaseService = Depends(get_db)
+):
     try:
-        response = supabase.auth.sign_in_with_password({
-            "email": request.email,
-            "password": request.password
-        })
+        response = await auth_service.sign_in(request.email, request.password)
         
         if not response.user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         # Get profile
-        profile = supabase.table("profiles").select("*").eq(
-            "id", response.user.id
-        ).single().execute()
+        profile = await db.get_profile(response.user.id)
         
         return AuthResponse(
             user_id=response.user.id,
             email=response.user.email,
-            name=profile.data.get("name", ""),
+            name=(profile or {}).get("name", ""),
             access_token=response.session.access_token
         )
     except Exception as e:
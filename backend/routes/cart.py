@@ -1,16 +1,17 @@
 # BACKEND: routes/cart.py - FIXED VERSION
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from middleware.auth_middleware import get_current_user
-import os
-from supabase import create_client, Client
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
+import asyncio
+from middleware.auth_middleware import get_current_user
+from services.cart_cache import CartCache, get_cart_cache
+from services.database import DatabaseService, get_db
+from services.idempotency import IdempotencyStore, get_idempotency_store
+from utils.config import settings
+from utils.helpers import is_uuid
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
 
 class CartItem(BaseModel):
     product_id: str
@@ -19,17 +20,40 @@ class CartItem(BaseModel):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+# Most operations accepted in one bulk request
+MAX_BULK_OPERATIONS = 100
+
+class CartOperation(BaseModel):
+    """add: increase a product's quantity; update: set it; remove: drop it.
+    update and remove target a cart row by item_id or by product_id."""
+    op: Literal["add", "update", "remove"]
+    product_id: Optional[str] = None
+    item_id: Optional[str] = None
+    quantity: Optional[int] = None
+
+class CartBulkRequest(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1, max_length=MAX_BULK_OPERATIONS)
+
 @router.get("/") 
-async def get_cart(current_user: dict = Depends(get_current_user)):
+async def get_cart(
+    current_user: dict = Depends(get_current_user),
+    cart: CartCache = Depends(get_cart_cache)
+):
     """Get user's cart with product details"""
     try:
-        # FIX: Use proper join syntax for Supabase
-        response = supabase.table("cart_items").select(
-            "id, product_id, quantity, created_at, updated_at, products(id, name, price, discount_price, image_url, stock_quantity)"
-        ).eq("user_id", current_user["id"]).execute()
-        
-        print(f"[CART] Fetched {len(response.data)} items for user {current_user['id']}")
-        return response.data
+        return (await cart.get(current_user["id"])).items
+    except Exception as e:
+        print(f"[CART ERROR] {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch cart: {str(e)}")
+
+@router.get("/summary")
+async def get_cart_summary(
+    current_user: dict = Depends(get_current_user),
+    cart: CartCache = Depends(get_cart_cache)
+):
+    """Item count and subtotals for the cart badge, from the cached cart"""
+    try:
+        return (await cart.get(current_user["id"])).summary
     except Exception as e:
         print(f"[CART ERROR] {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch cart: {str(e)}")
@@ -37,63 +61,51 @@ async def get_cart(current_user: dict = Depends(get_current_user)):
 @router.post("/items")
 async def add_to_cart(
     item: CartItem, 
-    current_user: dict = Depends(get_current_user)
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cart: CartCache = Depends(get_cart_cache),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Add item to cart or update quantity if exists"""
+    """
+    Add item to cart or update quantity if exists
+
+    With an Idempotency-Key header, a retried add is applied only once.
+    """
+    return await idempotency.run(
+        current_user["id"], "cart.add", idempotency_key, item.model_dump(),
+        lambda: add_cart_item(item, current_user, db, cart),
+        response
+    )
+
+async def add_cart_item(item: CartItem, current_user: dict, db: DatabaseService, cart: CartCache) -> dict:
+    """Add quantity of a product to the user's cart"""
     try:
-        # Verify product exists
-        product_check = supabase.table("products").select("id, stock_quantity").eq(
-            "id", item.product_id
-        ).execute()
-        
-        if not product_check.data:
+        if item.quantity < 1:
+            raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+
+        # Stock check, increment and insert happen in one database operation
+        result = await db.add_to_cart_item(current_user["id"], item.product_id, item.quantity)
+
+        if result["status"] == "not_found":
             raise HTTPException(status_code=404, detail="Product not found")
-        
-        product = product_check.data[0]
-        
-        # Check stock
-        if product["stock_quantity"] < item.quantity:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Only {product['stock_quantity']} items available"
-            )
-        
-        # Check if already in cart
-        existing = supabase.table("cart_items").select("*").eq(
-            "user_id", current_user["id"]
-        ).eq("product_id", item.product_id).execute()
-        
-        if existing.data:
-            # Update existing cart item
-            new_quantity = existing.data[0]['quantity'] + item.quantity
-            
-            if product["stock_quantity"] < new_quantity:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Cannot add more. Only {product['stock_quantity']} available"
-                )
-            
-            response = supabase.table("cart_items").update({
-                "quantity": new_quantity,
-                "updated_at": datetime.utcnow().isoformat()
-            }).eq("id", existing.data[0]['id']).execute()
-            
-            print(f"[CART] Updated item {existing.data[0]['id']} to quantity {new_quantity}")
-            return {"message": "Cart updated", "data": response.data[0]}
-        else:
-            # Insert new cart item - FIX: Add all required fields
-            insert_data = {
-                "user_id": current_user["id"],
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            
-            response = supabase.table("cart_items").insert(insert_data).execute()
-            
-            print(f"[CART] Added new item: {item.product_id} with quantity {item.quantity}")
-            return {"message": "Added to cart", "data": response.data[0]}
+
+        if result["status"] == "insufficient_stock":
+            if result["in_cart"]:
+                detail = f"Cannot add more. Only {result['available']} available"
+            else:
+                detail = f"Only {result['available']} items available"
+            raise HTTPException(status_code=400, detail=detail)
+
+        cart_item = result["item"]
+        await cart.put_rows(current_user["id"], [cart_item])
+        if cart_item["quantity"] > item.quantity:
+            print(f"[CART] Updated item {cart_item['id']} to quantity {cart_item['quantity']}")
+            return {"message": "Cart updated", "data": cart_item}
+
+        print(f"[CART] Added new item: {item.product_id} with quantity {item.quantity}")
+        return {"message": "Added to cart", "data": cart_item}
     
     except HTTPException:
         raise
@@ -105,57 +117,262 @@ async def add_to_cart(
 async def update_cart_item(
     item_id: str, 
     item: CartItemUpdate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cart: CartCache = Depends(get_cart_cache)
 ):
     """Update cart item quantity"""
     try:
         if item.quantity < 1:
             raise HTTPException(status_code=400, detail="Quantity must be at least 1")
         
-        # Get cart item with product info
-        cart_item = supabase.table("cart_items").select(
-            "*, products(stock_quantity)"
-        ).eq("id", item_id).eq("user_id", current_user["id"]).execute()
+        result = await db.set_cart_item_quantity(item_id, current_user["id"], item.quantity)
         
-        if not cart_item.data:
+        if result["status"] == "not_found":
             raise HTTPException(status_code=404, detail="Cart item not found")
         
-        stock = cart_item.data[0]["products"]["stock_quantity"]
-        if stock < item.quantity:
+        if result["status"] == "insufficient_stock":
             raise HTTPException(
                 status_code=400,
-                detail=f"Only {stock} items available"
+                detail=f"Only {result['available']} items available"
             )
         
-        response = supabase.table("cart_items").update({
-            "quantity": item.quantity,
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", item_id).eq("user_id", current_user["id"]).execute()
-        
-        return {"message": "Cart updated", "data": response.data[0] if response.data else {}}
+        await cart.put_rows(current_user["id"], [result["item"]])
+        return {"message": "Cart updated", "data": result["item"]}
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed: {str(e)}")
 
+def malformed_id(operation: CartOperation) -> Optional[str]:
+    """Error for a product_id or item_id that is not a UUID, else None"""
+    for field in ("product_id", "item_id"):
+        value = getattr(operation, field)
+        if value is not None and not is_uuid(value):
+            return f"{field} must be a UUID"
+    return None
+
+def plan_cart_operations(operations: List[CartOperation], rows: list, stock: dict) -> tuple:
+    """
+    Apply operations in order to an in-memory copy of the cart
+
+    rows are the current cart rows and stock maps product_id to its stock.
+    An operation that fails validation is reported and skipped; the rest
+    still apply. Returns (per-operation results, product_id -> quantity
+    after all operations, 0 meaning removed).
+    """
+    by_item = {row["id"]: row["product_id"] for row in rows}
+    quantities = {row["product_id"]: row["quantity"] for row in rows}
+    results = []
+
+    for index, operation in enumerate(operations):
+        product_id = operation.product_id or by_item.get(operation.item_id)
+        result = {"index": index, "op": operation.op, "product_id": product_id}
+        results.append(result)
+
+        def fail(status_code: int, detail: str):
+            result.update(success=False, status_code=status_code, error=detail)
+
+        id_error = malformed_id(operation)
+        if id_error:
+            fail(400, id_error)
+            continue
+        in_cart = quantities.get(product_id, 0)
+        if operation.op == "add" and not operation.product_id:
+            fail(400, "product_id is required")
+            continue
+        if operation.op != "add" and not in_cart:
+            fail(404, "Cart item not found")
+            continue
+        if operation.op == "remove":
+            quantities[product_id] = 0
+            result.update(success=True, quantity=0)
+            continue
+        if operation.quantity is None or operation.quantity < 1:
+            fail(400, "Quantity must be at least 1")
+            continue
+        if product_id not in stock:
+            fail(404, "Product not found")
+            continue
+
+        wanted = in_cart + operation.quantity if operation.op == "add" else operation.quantity
+        if wanted > stock[product_id]:
+            if operation.op == "add" and in_cart:
+                fail(400, f"Cannot add more. Only {stock[product_id]} available")
+            else:
+                fail(400, f"Only {stock[product_id]} items available")
+            continue
+
+        quantities[product_id] = wanted
+        result.update(success=True, quantity=wanted)
+
+    return results, quantities
+
+
+def operation_error(operation: CartOperation) -> Optional[tuple]:
+    """(status_code, detail) for an operation that is invalid on its face, else None"""
+    id_error = malformed_id(operation)
+    if id_error:
+        return 400, id_error
+    if operation.op == "add" and not operation.product_id:
+        return 400, "product_id is required"
+    if operation.op != "add" and not (operation.product_id or operation.item_id):
+        return 404, "Cart item not found"
+    if operation.op != "remove" and (operation.quantity is None or operation.quantity < 1):
+        return 400, "Quantity must be at least 1"
+    return None
+
+
+@router.post("/bulk")
+async def bulk_cart_operations(
+    request: CartBulkRequest,
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cart: CartCache = Depends(get_cart_cache)
+):
+    """
+    Apply many add/update/remove operations to the cart at once
+
+    Each operation gets its own result; a failed one does not stop the
+    others. With CART_RPC_ENABLED the operations run in one database
+    transaction with the stock checked there, so concurrent cart writes
+    cannot interleave with them. Otherwise they are planned in memory and
+    written in one batch, which concurrent writes can race.
+    """
+    user_id = current_user["id"]
+    try:
+        if settings.CART_RPC_ENABLED:
+            results = await apply_cart_operations(request.operations, user_id, db, cart)
+        else:
+            results = await write_planned_cart_operations(request.operations, user_id, db, cart)
+
+        failed = sum(1 for result in results if not result["success"])
+        print(f"[CART] Bulk update for user {user_id}: {len(results) - failed} applied, {failed} failed")
+        return {
+            "message": "Cart updated",
+            "applied": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[CART ERROR] {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed: {str(e)}")
+
+async def apply_cart_operations(operations: List[CartOperation], user_id: str,
+                                db: DatabaseService, cart: CartCache) -> list:
+    """Run the valid operations through the apply_cart_operations RPC in one round trip"""
+    results = [{"index": index, "op": operation.op, "product_id": operation.product_id}
+               for index, operation in enumerate(operations)]
+    pending = []
+    for result, operation in zip(results, operations):
+        error = operation_error(operation)
+        if error:
+            result.update(success=False, status_code=error[0], error=error[1])
+        else:
+            pending.append((result, operation))
+
+    outcomes = await db.apply_cart_operations(
+        user_id, [operation.model_dump(exclude_none=True) for _, operation in pending]
+    ) if pending else []
+
+    # Final row per product and every removed row, for the cart cache
+    written, remove_ids = {}, []
+    for (result, operation), outcome in zip(pending, outcomes):
+        item = outcome.get("item")
+        if item:
+            result["product_id"] = item["product_id"]
+
+        if outcome["status"] == "ok":
+            written[item["product_id"]] = item
+            result.update(success=True, quantity=item["quantity"], data=item)
+        elif outcome["status"] == "removed":
+            written.pop(item["product_id"], None)
+            remove_ids.append(item["id"])
+            result.update(success=True, quantity=0)
+        elif outcome["status"] == "not_found":
+            detail = "Product not found" if operation.op == "add" else "Cart item not found"
+            result.update(success=False, status_code=404, error=detail)
+        elif operation.op == "add" and outcome.get("in_cart"):
+            result.update(success=False, status_code=400,
+                          error=f"Cannot add more. Only {outcome['available']} available")
+        else:
+            result.update(success=False, status_code=400,
+                          error=f"Only {outcome['available']} items available")
+
+    await cart.put_rows(user_id, written.values())
+    cart.remove_rows(user_id, remove_ids)
+    return results
+
+async def write_planned_cart_operations(operations: List[CartOperation], user_id: str,
+                                        db: DatabaseService, cart: CartCache) -> list:
+    """
+    Plan the operations against the cart read up front and write the changes in one batch
+
+    The cart and the stock of every product involved are read with two
+    concurrent queries, however many operations there are.
+    """
+    # The cart rows carry their products' stock; other products are read alongside
+    product_ids = list({op.product_id for op in operations if op.product_id and not malformed_id(op)})
+    if product_ids:
+        rows, products = await asyncio.gather(
+            db.get_cart_rows(user_id),
+            db.get_products_by_ids(product_ids, "id, stock_quantity")
+        )
+    else:
+        rows, products = await db.get_cart_rows(user_id), []
+    stock = {row["product_id"]: row["products"]["stock_quantity"] for row in rows if row.get("products")}
+    stock.update((product["id"], product["stock_quantity"]) for product in products)
+
+    results, quantities = plan_cart_operations(operations, rows, stock)
+
+    by_product = {row["product_id"]: row for row in rows}
+    now = datetime.utcnow().isoformat()
+    writes, remove_ids = [], []
+    for product_id, quantity in quantities.items():
+        existing = by_product.get(product_id)
+        if existing and quantity == existing["quantity"]:
+            continue
+        if not quantity:
+            if existing:
+                remove_ids.append(existing["id"])
+            continue
+        row = {"user_id": user_id, "product_id": product_id, "quantity": quantity, "updated_at": now}
+        if existing:
+            row["id"] = existing["id"]
+        else:
+            row["created_at"] = now
+        writes.append(row)
+
+    written = await db.write_cart_rows(user_id, writes, remove_ids)
+    await cart.put_rows(user_id, written)
+    cart.remove_rows(user_id, remove_ids)
+    written_by_product = {row["product_id"]: row for row in written}
+    for result in results:
+        if result.get("success") and result["quantity"]:
+            result["data"] = written_by_product.get(result["product_id"], by_product.get(result["product_id"]))
+
+    return results
+
 @router.delete("/items/{item_id}")
 async def remove_from_cart(
     item_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cart: CartCache = Depends(get_cart_cache)
 ):
     """Remove item from cart"""
     try:
-        existing = supabase.table("cart_items").select("id").eq(
-            "id", item_id
-        ).eq("user_id", current_user["id"]).execute()
+        existing = await db.get_cart_item_by_id(item_id, current_user["id"], "id")
         
-        if not existing.data:
+        if not existing:
             raise HTTPException(status_code=404, detail="Cart item not found")
         
-        supabase.table("cart_items").delete().eq(
-            "id", item_id
-        ).eq("user_id", current_user["id"]).execute()
+        await db.remove_from_cart(item_id, current_user["id"])
+        cart.remove_rows(current_user["id"], [item_id])
         
         return {"message": "Removed from cart", "item_id": item_id}
     
@@ -165,12 +382,15 @@ async def remove_from_cart(
         raise HTTPException(status_code=400, detail=f"Failed: {str(e)}")
 
 @router.delete("/")
-async def clear_cart(current_user: dict = Depends(get_current_user)):
+async def clear_cart(
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cart: CartCache = Depends(get_cart_cache)
+):
     """Clear entire cart"""
     try:
-        supabase.table("cart_items").delete().eq(
-            "user_id", current_user["id"]
-        ).execute()
+        await db.clear_cart(current_user["id"])
+        cart.clear(current_user["id"])
         return {"message": "Cart cleared"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed: {str(e)}")
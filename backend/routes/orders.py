@@ -1,40 +1,89 @@
 # BACKEND: routes/orders.py
 # ============================================================================
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 import uuid
-import os
-from supabase import create_client, Client
 from middleware.auth_middleware import get_current_user # <--- IMPORT ADDED
+from services.cart_cache import CartCache, get_cart_cache
+from services.database import DatabaseService, get_db
+from services.idempotency import IdempotencyStore, get_idempotency_store
+from services.price_index import PriceIndex, get_price_index
+from utils.helpers import cursor_page, decode_cursor, effective_price, format_price, is_uuid
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+
+class OrderItem(BaseModel):
+    product_id: str
+    quantity: int = Field(..., ge=1)
 
 class OrderCreate(BaseModel):
-    items: List[dict]
+    items: List[OrderItem] = Field(..., min_length=1)
     payment_method: str
     shipping_address: str
 
 @router.post("/")
 async def create_order(
     order: OrderCreate, 
-    current_user: dict = Depends(get_current_user) # <--- SECURE DEPENDENCY
+    response: Response,
+    current_user: dict = Depends(get_current_user), # <--- SECURE DEPENDENCY
+    db: DatabaseService = Depends(get_db),
+    price_index: PriceIndex = Depends(get_price_index),
+    cart: CartCache = Depends(get_cart_cache),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    user_id = current_user["id"]
-    
+    """
+    Place an order for the given items
+
+    With an Idempotency-Key header, retries of the same request return the
+    order created by the first one instead of placing another.
+    """
+    return await idempotency.run(
+        current_user["id"], "orders.create", idempotency_key, order.model_dump(),
+        lambda: place_order(order, current_user["id"], db, price_index, cart),
+        response
+    )
+
+async def place_order(order: OrderCreate, user_id: str, db: DatabaseService,
+                      price_index: PriceIndex, cart: CartCache) -> dict:
+    """Price every line, create the order with its items and empty the cart"""
     try:
+        # Lines for the same product are merged, so stock is checked on the total
+        quantities = {}
+        for item in order.items:
+            if not is_uuid(item.product_id):
+                raise HTTPException(status_code=400, detail=f"Product {item.product_id} not found")
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+        # Price every line server-side; client-supplied prices are ignored
+        products = await price_index.get_many(quantities)
+        items = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product:
+                raise HTTPException(status_code=400, detail=f"Product {product_id} not found")
+            
+            if product["stock_quantity"] < quantity:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Only {product['stock_quantity']} of {product['name']} available"
+                )
+            
+            items.append({
+                "product_id": product["id"],
+                "quantity": quantity,
+                "price": effective_price(product["price"], product.get("discount_price"))
+            })
+        
         # Calculate total
-        total = sum(item["price"] * item["quantity"] for item in order.items)
+        total = format_price(sum(item["price"] * item["quantity"] for item in items))
         
-        # Create order
+        # Create order, its items and clear the cart in one batch
         order_id = str(uuid.uuid4())
-        order_data = supabase.table("orders").insert({
+        created = await db.create_order_with_items({
             "id": order_id,
             "user_id": user_id,
             "total_amount": total,
@@ -42,60 +91,60 @@ async def create_order(
             "shipping_address": order.shipping_address,
             "order_status": "pending",
             "created_at": datetime.utcnow().isoformat()
-        }).execute()
-        
-        # Add order items
-        for item in order.items:
-            supabase.table("order_items").insert({
-                "order_id": order_id,
-                "product_id": item["product_id"],
-                "quantity": item["quantity"],
-                "price": item["price"]
-            }).execute()
-        
-        # Clear cart
-        supabase.table("cart_items").delete().eq("user_id", user_id).execute()
-        
-        return order_data.data[0]
+        }, items)
+        cart.clear(user_id)
+        return created
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/")
-async def get_orders(current_user: dict = Depends(get_current_user)): # <--- FIXED HERE
-    """Get orders for the logged-in user"""
-    user_id = current_user["id"]
-    
-    response = supabase.table("orders").select(
-        "*, order_items(*, products(*))"
-    ).eq("user_id", user_id).order("created_at", desc=True).execute()
+async def get_orders(
+    current_user: dict = Depends(get_current_user), # <--- FIXED HERE
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opt in to cursor pagination; pass an empty value for the first page"),
+    db: DatabaseService = Depends(get_db)
+):
+    """
+    Get the logged-in user's orders as a compact list
+
+    Each order has id, order_status, total_amount, created_at, item_count
+    and thumbnail_url (the first line item's image); line items and
+    product details are on GET /orders/{order_id}. Without a cursor this
+    returns the latest limit orders; pass a cursor to page further back.
+    """
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        rows = await db.get_user_orders_page(current_user["id"], limit, after)
+        return cursor_page(rows, limit)
     
-    return response.data
+    return await db.get_user_orders(current_user["id"], limit)
 
 @router.get("/{order_id}")
 async def get_order(
     order_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db)
 ):
     """Get single order details"""
     # Verify the order belongs to this user
-    response = supabase.table("orders").select(
-        "*, order_items(*, products(*))"
-    ).eq("id", order_id).eq("user_id", current_user["id"]).single().execute()
+    order = await db.get_order_by_id(order_id, current_user["id"])
     
-    if not response.data:
+    if not order:
          raise HTTPException(status_code=404, detail="Order not found")
 
-    return response.data
+    return order
 
 @router.patch("/{order_id}")
 async def update_order(
     order_id: str, 
     status: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db)
 ):
     # Only allow updates if authorized (add admin check here if needed)
-    response = supabase.table("orders").update({
-        "order_status": status
-    }).eq("id", order_id).eq("user_id", current_user["id"]).execute()
-    
-    return response.data
+    return await db.update_order_status(order_id, current_user["id"], status)
@@ -1,17 +1,15 @@
 # BACKEND: routes/products.py
 # ============================================================================
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Depends
 from pydantic import BaseModel
-from typing import List, Optional
-import os
-from supabase import create_client, Client
+from typing import List, Optional, Union
+from middleware.auth_middleware import require_role
+from services.catalog_cache import CatalogCache, get_catalog
+from services.search_index import ProductSearchIndex, get_search_index
+from utils.helpers import cursor_page, decode_cursor
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
 
 class Product(BaseModel):
     id: str
@@ -21,63 +19,99 @@ class Product(BaseModel):
     discount_price: Optional[float] = None
     category: str
     image_url: str
+    # {"thumbnail"|"card"|"detail": {"jpeg"|"webp": url}, "source": image_url}
+    image_variants: Optional[dict] = None
     stock_quantity: int
     rating: float
     reviews_count: int
 
-@router.get("/", response_model=List[Product])
+class ProductPage(BaseModel):
+    data: List[Product]
+    next_cursor: Optional[str] = None
+
+CURSOR_DESCRIPTION = "Opt in to cursor pagination; pass an empty value for the first page"
+
+@router.get("/", response_model=Union[ProductPage, List[Product]])
 async def get_products(
-    limit: int = Query(12, le=100),
-    offset: int = Query(0),
-    category: Optional[str] = Query(None)
+    limit: int = Query(12, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    category: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    catalog: CatalogCache = Depends(get_catalog)
 ):
     """Get all products with optional filtering"""
     try:
-        query = supabase.table("products").select("*")
-        
-        if category:
-            query = query.ilike("category", category)
+        if cursor is not None:
+            rows = await catalog.get_products_page(limit, decode_cursor(cursor), category)
+            return cursor_page(rows, limit)
         
-        response = query.range(offset, offset + limit - 1).execute()
-        return response.data if response.data else []
+        return await catalog.get_products(limit, offset, category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch products: {str(e)}")
 
 @router.get("/search")
-async def search_products(q: str = Query(..., min_length=1)):
-    """Search products by name"""
+async def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    catalog: CatalogCache = Depends(get_catalog),
+    search_index: ProductSearchIndex = Depends(get_search_index)
+):
+    """Search products by name, description and category"""
     try:
-        response = supabase.table("products").select("*").ilike(
-            "name", f"%{q}%"
-        ).execute()
-        return response.data if response.data else []
+        if search_index.ready:
+            return search_index.search(q, limit, offset)
+        
+        # Index still building: name-only database search
+        results = await catalog.search(q)
+        return results[offset:offset + limit]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @router.get("/category/{category_name}")
-async def get_by_category(category_name: str):
+async def get_by_category(
+    category_name: str,
+    limit: int = Query(12, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    catalog: CatalogCache = Depends(get_catalog)
+):
     """Get products by category"""
     try:
-        response = supabase.table("products").select("*").eq(
-            "category", category_name
-        ).execute()
-        return response.data if response.data else []
+        if cursor is not None:
+            rows = await catalog.get_products_page(
+                limit, decode_cursor(cursor), category_name, exact_category=True
+            )
+            return cursor_page(rows, limit)
+        
+        return await catalog.get_by_category(category_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch category: {str(e)}")
 
 @router.get("/{product_id}", response_model=Product)
-async def get_product(product_id: str):
+async def get_product(product_id: str, catalog: CatalogCache = Depends(get_catalog)):
     """Get single product by ID"""
     try:
-        response = supabase.table("products").select("*").eq(
-            "id", product_id
-        ).single().execute()
+        product = await catalog.get_product(product_id)
         
-        if not response.data:
+        if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        return response.data if response.data else []
+        return product
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch product: {str(e)}")
+
+@router.post("/cache/invalidate")
+async def invalidate_catalog_cache(
+    product_id: Optional[str] = Query(None),
+    catalog: CatalogCache = Depends(get_catalog),
+    current_user: dict = Depends(require_role("admin"))
+):
+    """Drop cached catalog data after products are changed"""
+    catalog.invalidate(product_id)
+    return {"message": "Catalog cache invalidated", "product_id": product_id}
@@ -1,19 +1,14 @@
 # BACKEND: routes/reviews.py
 # ============================================================================
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List
 from datetime import datetime
 import uuid
-import os
-from supabase import create_client, Client
+from services.database import DatabaseService, get_db
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
 
 class ReviewCreate(BaseModel):
     product_id: str
@@ -28,25 +23,26 @@ class Review(BaseModel):
     created_at: str
 
 @router.post("/")
-async def create_review(review: ReviewCreate, user_id: str = None):
+async def create_review(
+    review: ReviewCreate,
+    user_id: str = None,
+    db: DatabaseService = Depends(get_db)
+):
     if not user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    response = supabase.table("reviews").insert({
+    return await db.create_review({
         "id": str(uuid.uuid4()),
         "user_id": user_id,
         "product_id": review.product_id,
         "rating": review.rating,
         "comment": review.comment,
         "created_at": datetime.utcnow().isoformat()
-    }).execute()
-    
-    return response.data[0]
+    })
 
 @router.get("/product/{product_id}")
-async def get_product_reviews(product_id: str) -> List[Review]:
-    response = supabase.table("reviews").select("*").eq(
-        "product_id", product_id
-    ).execute()
-    
-    return response.data
+async def get_product_reviews(
+    product_id: str,
+    db: DatabaseService = Depends(get_db)
+) -> List[Review]:
+    return await db.get_product_reviews(product_id)
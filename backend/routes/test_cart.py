@@ -0,0 +1,203 @@
+# backend/routes/test_cart.py
+# ============================================================================
+
+import asyncio
+import uuid
+from routes.cart import (
+    CartOperation, apply_cart_operations, plan_cart_operations, write_planned_cart_operations
+)
+
+A, B, C, MISSING = (str(uuid.uuid4()) for _ in range(4))
+ITEM_A, ITEM_B, ITEM_C, GONE = (str(uuid.uuid4()) for _ in range(4))
+
+ROWS = [
+    {"id": ITEM_A, "product_id": A, "quantity": 2, "products": {"stock_quantity": 5}},
+    {"id": ITEM_B, "product_id": B, "quantity": 1, "products": {"stock_quantity": 3}},
+]
+STOCK = {A: 5, B: 3, C: 4}
+
+
+def ops(*operations) -> list:
+    return [CartOperation(**operation) for operation in operations]
+
+
+class FakeCart:
+    """Records write-through calls instead of caching"""
+
+    def __init__(self):
+        self.put = []
+        self.removed = []
+
+    async def put_rows(self, user_id, rows):
+        self.put.extend(rows)
+
+    def remove_rows(self, user_id, item_ids):
+        self.removed.extend(item_ids)
+
+
+class FakeDB:
+    def __init__(self, rows=(), products=(), outcomes=()):
+        self.rows = list(rows)
+        self.products = list(products)
+        self.outcomes = list(outcomes)
+        self.writes = None
+        self.sent = None
+
+    async def get_cart_rows(self, user_id):
+        return self.rows
+
+    async def get_products_by_ids(self, product_ids, columns="*"):
+        return [product for product in self.products if product["id"] in product_ids]
+
+    async def write_cart_rows(self, user_id, rows, remove_ids):
+        self.writes = (rows, remove_ids)
+        return [{**row, "id": row.get("id", f"new-{row['product_id']}")} for row in rows]
+
+    async def apply_cart_operations(self, user_id, operations):
+        self.sent = operations
+        return self.outcomes
+
+
+def test_plan_applies_operations_in_order():
+    results, quantities = plan_cart_operations(ops(
+        {"op": "add", "product_id": A, "quantity": 1},
+        {"op": "update", "item_id": ITEM_B, "quantity": 3},
+        {"op": "add", "product_id": C, "quantity": 2},
+        {"op": "remove", "product_id": A},
+    ), ROWS, STOCK)
+
+    assert all(result["success"] for result in results)
+    assert results[1]["product_id"] == B
+    assert quantities == {A: 0, B: 3, C: 2}
+
+
+def test_plan_checks_stock_against_earlier_operations():
+    results, quantities = plan_cart_operations(ops(
+        {"op": "add", "product_id": A, "quantity": 2},
+        {"op": "add", "product_id": A, "quantity": 2},
+        {"op": "add", "product_id": C, "quantity": 5},
+    ), ROWS, STOCK)
+
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[1]["error"] == "Cannot add more. Only 5 available"
+    assert results[2]["error"] == "Only 4 items available"
+    assert quantities[A] == 4
+
+
+def test_plan_reports_invalid_operations_and_keeps_going():
+    results, quantities = plan_cart_operations(ops(
+        {"op": "add", "quantity": 1},
+        {"op": "update", "product_id": C, "quantity": 1},
+        {"op": "update", "product_id": A, "quantity": 0},
+        {"op": "add", "product_id": MISSING, "quantity": 1},
+        {"op": "update", "product_id": A, "quantity": 4},
+    ), ROWS, STOCK)
+
+    assert [result.get("status_code") for result in results] == [400, 404, 400, 404, None]
+    assert quantities[A] == 4
+
+
+def test_planned_write_inserts_new_rows_and_updates_existing_ones():
+    async def scenario():
+        db = FakeDB(rows=ROWS, products=[{"id": C, "stock_quantity": 4}])
+        cart = FakeCart()
+        results = await write_planned_cart_operations(ops(
+            {"op": "update", "product_id": A, "quantity": 3},
+            {"op": "add", "product_id": C, "quantity": 1},
+            {"op": "remove", "item_id": ITEM_B},
+        ), "user", db, cart)
+        return db, cart, results
+
+    db, cart, results = asyncio.run(scenario())
+    rows, remove_ids = db.writes
+    update, insert = rows
+    assert update["id"] == ITEM_A and "created_at" not in update
+    assert "id" not in insert and "created_at" in insert
+    assert remove_ids == [ITEM_B]
+    assert cart.removed == [ITEM_B]
+    assert [row["product_id"] for row in cart.put] == [A, C]
+    assert results[1]["data"]["id"] == f"new-{C}"
+
+
+def test_planned_write_skips_unchanged_rows():
+    async def scenario():
+        db = FakeDB(rows=ROWS)
+        await write_planned_cart_operations(ops(
+            {"op": "update", "product_id": A, "quantity": 2},
+        ), "user", db, FakeCart())
+        return db
+
+    assert asyncio.run(scenario()).writes == ([], [])
+
+
+def test_rpc_results_are_mapped_per_operation():
+    added = {"id": ITEM_C, "product_id": C, "quantity": 1}
+    removed = {"id": ITEM_B, "product_id": B, "quantity": 1}
+
+    async def scenario():
+        db = FakeDB(outcomes=[
+            {"status": "ok", "item": added},
+            {"status": "removed", "item": removed},
+            {"status": "insufficient_stock", "available": 5, "in_cart": 2},
+            {"status": "not_found"},
+        ])
+        cart = FakeCart()
+        results = await apply_cart_operations(ops(
+            {"op": "add", "product_id": C, "quantity": 1},
+            {"op": "update", "product_id": A, "quantity": 0},
+            {"op": "remove", "item_id": ITEM_B},
+            {"op": "add", "product_id": A, "quantity": 9},
+            {"op": "update", "item_id": GONE, "quantity": 1},
+        ), "user", db, cart)
+        return db, cart, results
+
+    db, cart, results = asyncio.run(scenario())
+    # The invalid quantity never reaches the database
+    assert len(db.sent) == 4
+    assert db.sent[1] == {"op": "remove", "item_id": ITEM_B}
+    assert results[0]["data"] == added
+    assert results[1]["status_code"] == 400
+    assert results[2]["success"] and results[2]["product_id"] == B
+    assert results[3]["error"] == "Cannot add more. Only 5 available"
+    assert results[4]["error"] == "Cart item not found"
+    assert cart.put == [added]
+    assert cart.removed == [ITEM_B]
+
+
+def test_rpc_add_then_remove_leaves_nothing_to_cache():
+    row = {"id": ITEM_C, "product_id": C, "quantity": 1}
+
+    async def scenario():
+        db = FakeDB(outcomes=[{"status": "ok", "item": row}, {"status": "removed", "item": row}])
+        cart = FakeCart()
+        await apply_cart_operations(ops(
+            {"op": "add", "product_id": C, "quantity": 1},
+            {"op": "remove", "product_id": C},
+        ), "user", db, cart)
+        return cart
+
+    cart = asyncio.run(scenario())
+    assert cart.put == []
+    assert cart.removed == [ITEM_C]
+
+
+def test_malformed_ids_fail_only_their_own_operation():
+    operations = ops(
+        {"op": "add", "product_id": "not-a-uuid", "quantity": 1},
+        {"op": "remove", "item_id": "42"},
+        {"op": "add", "product_id": C, "quantity": 1},
+    )
+
+    async def scenario():
+        planned_db = FakeDB(rows=ROWS, products=[{"id": C, "stock_quantity": 4}])
+        planned = await write_planned_cart_operations(operations, "user", planned_db, FakeCart())
+        rpc_db = FakeDB(outcomes=[{"status": "ok", "item": {"id": ITEM_C, "product_id": C, "quantity": 1}}])
+        rpc = await apply_cart_operations(operations, "user", rpc_db, FakeCart())
+        return planned, rpc, rpc_db
+
+    planned, rpc, rpc_db = asyncio.run(scenario())
+    for results in (planned, rpc):
+        assert [result["success"] for result in results] == [False, False, True]
+        assert results[0] == {**results[0], "status_code": 400, "error": "product_id must be a UUID"}
+        assert results[1]["error"] == "item_id must be a UUID"
+    assert rpc_db.sent == [{"op": "add", "product_id": C, "quantity": 1}]
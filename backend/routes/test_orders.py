@@ -0,0 +1,76 @@
+# backend/routes/test_orders.py
+# ============================================================================
+
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from routes.orders import OrderCreate, place_order
+
+SHIRT = {"id": str(uuid.uuid4()), "name": "Shirt", "price": 20.0, "discount_price": 15.0, "stock_quantity": 3}
+
+
+class FakePriceIndex:
+    async def get_many(self, product_ids):
+        return {product_id: SHIRT for product_id in product_ids if product_id == SHIRT["id"]}
+
+
+class FakeDB:
+    def __init__(self):
+        self.created = None
+
+    async def create_order_with_items(self, order: dict, items: list):
+        self.created = (order, items)
+        return order
+
+
+class FakeCart:
+    def clear(self, user_id):
+        pass
+
+
+def order(*items) -> OrderCreate:
+    return OrderCreate(items=list(items), payment_method="cod", shipping_address="1 Main St")
+
+
+def place(new_order: OrderCreate):
+    db = FakeDB()
+    asyncio.run(place_order(new_order, "user", db, FakePriceIndex(), FakeCart()))
+    return db.created
+
+
+def test_lines_for_one_product_are_merged_and_priced_server_side():
+    created, items = place(order(
+        {"product_id": SHIRT["id"], "quantity": 1, "price": 0.01},
+        {"product_id": SHIRT["id"], "quantity": 2},
+    ))
+    assert items == [{"product_id": SHIRT["id"], "quantity": 3, "price": 15.0}]
+    assert created["total_amount"] == 45.0
+
+
+def test_stock_is_checked_on_the_total_per_product():
+    with pytest.raises(HTTPException) as error:
+        place(order(
+            {"product_id": SHIRT["id"], "quantity": 2},
+            {"product_id": SHIRT["id"], "quantity": 2},
+        ))
+    assert error.value.status_code == 400
+    assert error.value.detail == "Only 3 of Shirt available"
+
+
+def test_unknown_and_malformed_products_are_rejected():
+    for product_id in (str(uuid.uuid4()), "not-a-uuid"):
+        with pytest.raises(HTTPException) as error:
+            place(order({"product_id": product_id, "quantity": 1}))
+        assert error.value.detail == f"Product {product_id} not found"
+
+
+@pytest.mark.parametrize("items", [
+    [],
+    [{"quantity": 1}],
+    [{"product_id": SHIRT["id"], "quantity": 0}],
+])
+def test_malformed_items_fail_validation(items):
+    with pytest.raises(ValidationError):
+        OrderCreate(items=items, payment_method="cod", shipping_address="1 Main St")
@@ -1,28 +1,38 @@
 # BACKEND: routes/tryOn.py
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from middleware.auth_middleware import get_current_user
-import os
-import uuid
-import shutil
-import requests
+import json
 from datetime import datetime
-from supabase import create_client, Client
+from services.database import DatabaseService, get_db
+from services.image_executor import ExecutorBusyError, ImageExecutor, get_image_executor
+from services.media_store import MediaStore, get_media_store
+from services.tryon_cache import TryOnResultCache, get_tryon_cache
+from services.job_queue import Job, JobQueue, QueueFullError, UserJobLimitError, get_tryon_jobs
+from services.tryon_router import TryOnRequest, TryOnRouter, get_tryon_router
+from utils.helpers import cursor_page, decode_cursor
+from utils.config import settings
+from utils.image_processor import HEADER_SIZE, ImageProcessor, ImageTooLargeError, ProcessedImage, UnsupportedImageError
 
 router = APIRouter()
 
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
-
-# Hugging Face API configuration
-HF_API_KEY = os.getenv("HUGGING_FACE_API_KEY")
+# Seconds between keep-alive comments on an idle job event stream
+SSE_KEEPALIVE = 15
 
 @router.post("/generate")
 async def generate_tryon(
+    response: Response,
     user_image: UploadFile = File(...),
     product_id: str = Form(...),
-    current_user: dict = Depends(get_current_user)
+    mode: Literal["sync", "async"] = Query("sync", description="async queues the try-on and returns a job id to poll"),
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db),
+    cache: TryOnResultCache = Depends(get_tryon_cache),
+    media: MediaStore = Depends(get_media_store),
+    images: ImageExecutor = Depends(get_image_executor),
+    jobs: JobQueue = Depends(get_tryon_jobs),
+    backends: TryOnRouter = Depends(get_tryon_router)
 ):
     """
     Generate virtual try-on image
@@ -35,108 +45,168 @@ async def generate_tryon(
         - original_image: str (URL)
         - generated_image: str (URL)
         - product_name: str
-        - method: str (which AI service was used)
+        - method: str (which try-on backend answered)
+        - cached: bool (an identical earlier try-on was reused)
+
+    With mode=async the inputs are validated, the try-on is queued and a
+    202 with the job id is returned; poll /tryOn/jobs/{job_id} (or stream
+    /tryOn/jobs/{job_id}/events) for progress and the final URLs.
     """
     user_id = current_user["id"]
-    temp_user_path = f"temp_user_{uuid.uuid4()}.jpg"
-    user_photo_url = None
 
+    # ─────────────────────────────────────────────────────────────────
+    # STEP 1: VALIDATE & FETCH PRODUCT
+    # ─────────────────────────────────────────────────────────────────
+    product = await db.get_product_by_id(product_id)
+    
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # ─────────────────────────────────────────────────────────────────
+    # STEP 2: VALIDATE USER IMAGE
+    # ─────────────────────────────────────────────────────────────────
+    
+    # Validate file type
+    if not user_image.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    # Validate the header bytes and size while streaming the upload in
     try:
-        # ─────────────────────────────────────────────────────────────────
-        # STEP 1: VALIDATE & FETCH PRODUCT
-        # ─────────────────────────────────────────────────────────────────
-        product_response = supabase.table("products").select("*").eq(
-            "id", product_id
-        ).single().execute()
-        
-        if not product_response.data:
-            raise HTTPException(status_code=404, detail="Product not found")
-        
-        product = product_response.data
-        product_image_url = product['image_url']
-        product_name = product['name']
-        product_category = product.get('category', 'clothing')
+        file_content, _ = await ImageProcessor.read_upload(user_image)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Decode once: orient, shrink and re-encode the photo before it is hashed and stored
+    try:
+        photo = await images.run(ImageProcessor.normalize, file_content, settings.TRYON_PHOTO_MAX_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if mode == "sync":
+        return await run_tryon(db, cache, media, backends, user_id, product, photo)
+
+    async def handler(job: Job) -> dict:
+        result = await run_tryon(db, cache, media, backends, user_id, product, photo, job)
+        if not result["success"]:
+            raise Exception(result["error"])
+        return result
+
+    try:
+        job = jobs.submit(user_id, handler)
+    except UserJobLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    response.status_code = 202
+    return {
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/tryOn/jobs/{job.id}",
+        "events_url": f"/tryOn/jobs/{job.id}/events"
+    }
+
+
+async def run_tryon(db: DatabaseService, cache: TryOnResultCache, media: MediaStore, backends: TryOnRouter,
+                    user_id: str, product: dict, photo: ProcessedImage, job: Optional[Job] = None) -> dict:
+    """
+    Upload the photo, generate the try-on and record it in the history
+
+    Results are cached per user by photo content, product and preferred
+    backend, so a retry of the same try-on skips the uploads and the model
+    call entirely.
+    Failures are returned as an unsuccessful response rather than raised.
+    When run as a background job, progress is reported on the job.
+    """
+    user_photo_url = None
+    generated = False
+    product_id = product['id']
+    product_name = product['name']
+    cache_key = TryOnResultCache.key(user_id, photo.data, product, backends.primary)
+
+    def report(stage: str, progress: int):
+        if job is not None:
+            job.update(stage=stage, progress=progress)
+
+    async def generate() -> dict:
+        nonlocal user_photo_url, generated
+        generated = True
 
         # ─────────────────────────────────────────────────────────────────
-        # STEP 2: VALIDATE & SAVE USER IMAGE
+        # STEP 1: SAVE USER IMAGE
         # ─────────────────────────────────────────────────────────────────
-        
-        # Validate file type
-        if not user_image.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Validate file size (5MB max)
-        file_content = await user_image.read()
-        if len(file_content) > 5 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Image must be less than 5MB")
-        
-        # Save temporarily
-        with open(temp_user_path, "wb") as buffer:
-            buffer.write(file_content)
-            
-        # Upload to Supabase Storage
-        user_filename = f"{user_id}/{uuid.uuid4()}.jpg"
-        upload_response = supabase.storage.from_("user-photos").upload(
-            user_filename, 
-            file_content, 
-            {"content-type": user_image.content_type}
-        )
-        
-        if upload_response.error:
-            raise Exception(f"Storage upload failed: {upload_response.error}")
-        
-        # Get public URL
-        user_photo_url = supabase.storage.from_("user-photos").get_public_url(user_filename)
+        report("uploading", 10)
+
+        # Stored once per distinct photo and reused by later try-ons
+        try:
+            user_photo_url = await media.put("user-photos", user_id, photo.data, photo.mime_type)
+        except Exception as e:
+            raise Exception(f"Storage upload failed: {str(e)}")
 
         # ─────────────────────────────────────────────────────────────────
-        # STEP 3: GENERATE TRY-ON IMAGE
+        # STEP 2: GENERATE TRY-ON IMAGE
         # ─────────────────────────────────────────────────────────────────
-        
-        # For now, use a simple approach - return the user's original image
-        # In production, this would call the AI backend service
-        # You can integrate with the Node.js AI service or use Gradio client
-        
+        report("generating", 40)
+
         print(f"[TRY-ON] Processing for user {user_id}, product {product_name}")
-        
-        # Upload the same image as "generated" for demo
-        # Replace this with actual AI generation in production
-        generated_filename = f"{user_id}/{uuid.uuid4()}.jpg"
-        gen_upload = supabase.storage.from_("generated-images").upload(
-            generated_filename, 
-            file_content, 
-            {"content-type": "image/jpeg"}
-        )
-        
-        if gen_upload.error:
-            raise Exception(f"Failed to upload generated image: {gen_upload.error}")
-        
-        generated_url = supabase.storage.from_("generated-images").get_public_url(generated_filename)
+
+        # First backend in the fallback chain to answer wins
+        model, generated_image = await backends.generate(TryOnRequest(photo, user_photo_url, product))
+        image_format = ImageProcessor.sniff_format(generated_image[:HEADER_SIZE]) or "JPEG"
+        try:
+            generated_url = await media.put(
+                "generated-images", user_id, generated_image, ImageProcessor.MIME_TYPES[image_format]
+            )
+        except Exception as e:
+            raise Exception(f"Failed to upload generated image: {str(e)}")
 
         # ─────────────────────────────────────────────────────────────────
-        # STEP 4: SAVE TO DATABASE
+        # STEP 3: SAVE TO DATABASE
         # ─────────────────────────────────────────────────────────────────
-        supabase.table("tryon_history").insert({
+        report("saving", 80)
+        created_at = datetime.utcnow().isoformat()
+        history = await db.create_tryon_history({
             "user_id": user_id,
             "product_id": product_id,
             "original_image_url": user_photo_url,
             "generated_image_url": generated_url,
-            "created_at": datetime.utcnow().isoformat()
-        }).execute()
+            "created_at": created_at
+        })
+
+        return {
+            "cache_key": cache_key,
+            "product_id": product_id,
+            "model": model,
+            "user_id": user_id,
+            "history_id": history.get("id"),
+            "original_image_url": user_photo_url,
+            "generated_image_url": generated_url,
+            "created_at": created_at
+        }
+
+    try:
+        result = await cache.get_or_generate(cache_key, generate, backends.primary)
 
         # ─────────────────────────────────────────────────────────────────
-        # STEP 5: RETURN SUCCESS RESPONSE
+        # STEP 4: RETURN SUCCESS RESPONSE
         # ─────────────────────────────────────────────────────────────────
         return {
             "success": True,
-            "original_image": user_photo_url,
-            "generated_image": generated_url,
+            "original_image": result["original_image_url"],
+            "generated_image": result["generated_image_url"],
             "product_name": product_name,
-            "method": "Demo",
+            "method": backends.label(result["model"]),
+            "history_id": result["history_id"],
+            "cached": not generated,
             "message": "Try-on generated successfully"
         }
-
-    except HTTPException:
-        raise
     
     except Exception as e:
         print(f"[TRY-ON] Error: {str(e)}")
@@ -147,33 +217,73 @@ async def generate_tryon(
             "error": f"Try-on failed: {str(e)}",
             "original_image": user_photo_url or "",
             "generated_image": "",
-            "product_name": product_name if 'product_name' in locals() else "",
+            "product_name": product_name,
             "method": "Error"
         }
-        
-    finally:
-        # Cleanup temporary file
-        if os.path.exists(temp_user_path):
-            os.remove(temp_user_path)
+
+
+@router.get("/jobs/{job_id}")
+async def get_tryon_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    jobs: JobQueue = Depends(get_tryon_jobs)
+):
+    """Get the status, progress and (once finished) result of a try-on job"""
+    job = jobs.get(job_id)
+    if not job or job.user_id != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "data": job.to_dict()}
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_tryon_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    jobs: JobQueue = Depends(get_tryon_jobs)
+):
+    """Stream job updates as server-sent events until the job finishes"""
+    job = jobs.get(job_id)
+    if not job or job.user_id != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        while True:
+            version = job.version
+            yield f"event: {job.status}\ndata: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                return
+            while not await job.wait_for_change(version, SSE_KEEPALIVE):
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/history")
 async def get_tryon_history(
     current_user: dict = Depends(get_current_user),
-    limit: int = 10
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opt in to cursor pagination; pass an empty value for the first page"),
+    db: DatabaseService = Depends(get_db)
 ):
     """Get user's virtual try-on history"""
     try:
-        response = supabase.table("tryon_history").select(
-            "*, products(name, image_url)"
-        ).eq("user_id", current_user["id"]).order(
-            "created_at", desc=True
-        ).limit(limit).execute()
+        if cursor is not None:
+            rows = await db.get_tryon_history_page(current_user["id"], limit, decode_cursor(cursor))
+            return {"success": True, **cursor_page(rows, limit)}
+        
+        history = await db.get_tryon_history(current_user["id"], limit)
         
         return {
             "success": True,
-            "data": response.data
+            "data": history
         }
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
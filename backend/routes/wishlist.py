@@ -2,56 +2,45 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from middleware.auth_middleware import get_current_user
-import os
-from supabase import create_client, Client
+from services.database import DatabaseService, get_db
 
 router = APIRouter()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
 
 class WishlistItem(BaseModel):
     product_id: str
 
 @router.get("")
-async def get_wishlist(current_user: dict = Depends(get_current_user)):
+async def get_wishlist(
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db)
+):
     """Get user's wishlist with product details"""
     try:
-        response = supabase.table("wishlist").select(
-            "*, products(*)"
-        ).eq("user_id", current_user["id"]).execute()
-        return response.data
+        return await db.get_wishlist(current_user["id"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch wishlist: {str(e)}")
 
 @router.post("")
 async def add_to_wishlist(
     item: WishlistItem,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db)
 ):
     """Add product to wishlist"""
     try:
-        product_check = supabase.table("products").select("id").eq(
-            "id", item.product_id
-        ).execute()
+        product = await db.get_product_by_id(item.product_id, "id")
         
-        if not product_check.data:
+        if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
-        existing = supabase.table("wishlist").select("*").eq(
-            "user_id", current_user["id"]
-        ).eq("product_id", item.product_id).execute()
+        existing = await db.get_wishlist_item(current_user["id"], item.product_id)
         
-        if existing.data:
-            return {"message": "Already in wishlist", "data": existing.data[0]}
+        if existing:
+            return {"message": "Already in wishlist", "data": existing}
         
-        response = supabase.table("wishlist").insert({
-            "user_id": current_user["id"],
-            "product_id": item.product_id
-        }).execute()
+        created = await db.add_to_wishlist(current_user["id"], item.product_id)
         
-        return {"message": "Added to wishlist", "data": response.data[0]}
+        return {"message": "Added to wishlist", "data": created}
     
     except HTTPException:
         raise
@@ -61,20 +50,17 @@ async def add_to_wishlist(
 @router.delete("/{product_id}")
 async def remove_from_wishlist(
     product_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: DatabaseService = Depends(get_db)
 ):
     """Remove product from wishlist"""
     try:
-        existing = supabase.table("wishlist").select("*").eq(
-            "user_id", current_user["id"]
-        ).eq("product_id", product_id).execute()
+        existing = await db.get_wishlist_item(current_user["id"], product_id)
         
-        if not existing.data:
+        if not existing:
             raise HTTPException(status_code=404, detail="Not in wishlist")
         
-        supabase.table("wishlist").delete().eq(
-            "user_id", current_user["id"]
-        ).eq("product_id", product_id).execute()
+        await db.remove_from_wishlist(current_user["id"], product_id)
         
         return {"message": "Removed from wishlist", "product_id": product_id}
     
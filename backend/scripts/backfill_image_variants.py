@@ -0,0 +1,48 @@
+# backend/scripts/backfill_image_variants.py
+# ============================================================================
+# Generate thumbnail/card/detail derivatives for every product image.
+#
+#   python -m scripts.backfill_image_variants [--concurrency 8] [--force]
+#
+# Products whose image_variants already match their image_url are skipped,
+# as are individual files that already exist in storage. Run it from the
+# backend directory after importing or changing product images.
+
+import argparse
+import asyncio
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.database import DatabaseService
+from services.image_executor import ImageExecutor
+from services.product_images import ProductImageVariants, create_variant_store
+from services.supabase_client import SupabaseClients
+from utils.config import settings
+
+
+async def main(concurrency: int, force: bool):
+    clients = SupabaseClients()
+    db = DatabaseService(clients)
+    # Rendering is CPU-bound, so spread it over processes
+    executor = ImageExecutor("process", max_queued=concurrency, timeout=settings.IMAGE_TASK_TIMEOUT)
+    http = httpx.AsyncClient(timeout=settings.TRYON_FETCH_TIMEOUT, follow_redirects=True)
+    try:
+        variants = ProductImageVariants(db, create_variant_store(db), http, executor)
+        products = await db.list_all_products()
+        print(f"[VARIANTS] Processing {len(products)} products")
+        counts = await variants.backfill(products, concurrency, force)
+        print(f"[VARIANTS] Done: {counts}")
+    finally:
+        await http.aclose()
+        executor.shutdown()
+        await clients.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill resized product image derivatives")
+    parser.add_argument("--concurrency", type=int, default=4, help="products processed at once")
+    parser.add_argument("--force", action="store_true", help="re-check products that look up to date")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.force))
@@ -0,0 +1,96 @@
+# backend/scripts/benchmark_overlay.py
+# ============================================================================
+# Compare the NumPy overlay compositor with the previous PIL paste.
+#
+#   python -m scripts.benchmark_overlay [--size 1024] [--runs 20]
+#
+# Uses a synthetic person photo and a garment on a white backdrop, the
+# typical product shot.
+
+import argparse
+import time
+from io import BytesIO
+from typing import Union
+from PIL import Image, ImageDraw
+from services.garment_cache import GarmentAsset, build_garment_asset
+from services.improved_tryon_service import compose_overlay
+from utils.config import settings
+
+
+def compose_overlay_pil(person_image: bytes, garment_image: Union[bytes, GarmentAsset]) -> bytes:
+    """Previous PIL-only overlay: plain paste, no background removal"""
+    try:
+        person = Image.open(BytesIO(person_image))
+
+        # Resize garment to fit on person
+        person = person.convert("RGBA")
+
+        # Calculate position (center of image, slightly up)
+        garment_width = int(person.width * 0.6)
+        if isinstance(garment_image, GarmentAsset):
+            # Already decoded; scaled from the nearest cached width
+            garment = garment_image.scaled(garment_width)
+        else:
+            garment = Image.open(BytesIO(garment_image)).convert("RGBA")
+            garment_height = int(garment.height * (garment_width / garment.width))
+            garment = garment.resize((garment_width, garment_height))
+
+        position = (
+            (person.width - garment_width) // 2,
+            int(person.height * 0.25)
+        )
+
+        # Create result
+        result = person.copy()
+        result.paste(garment, position, garment)
+
+        # Add watermark
+        draw = ImageDraw.Draw(result)
+        draw.text((10, 10), "Virtual Try-On Preview", fill=(255, 255, 255, 180))
+
+        # Convert to bytes
+        output = BytesIO()
+        result.convert("RGB").save(output, format="JPEG", quality=90)
+        return output.getvalue()
+
+    except Exception as e:
+        print(f"Overlay failed: {e}")
+        return person_image
+
+
+def synthetic_images(size: int) -> tuple:
+    person = Image.radial_gradient("L").resize((size, int(size * 1.33))).convert("RGB")
+    garment = Image.new("RGB", (800, 1000), (255, 255, 255))
+    draw = ImageDraw.Draw(garment)
+    draw.polygon([(150, 100), (650, 100), (750, 400), (600, 950), (200, 950), (50, 400)], fill=(30, 60, 160))
+    draw.ellipse((330, 80, 470, 200), fill=(255, 255, 255))
+
+    encoded = []
+    for image in (person, garment):
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=90)
+        encoded.append(output.getvalue())
+    return tuple(encoded)
+
+
+def bench(label: str, fn, runs: int):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    elapsed = (time.perf_counter() - started) / runs
+    print(f"{label:<34} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark try-on overlay compositing")
+    parser.add_argument("--size", type=int, default=1024, help="person photo width")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    person, garment = synthetic_images(args.size)
+    asset = build_garment_asset("benchmark", garment, settings.GARMENT_WIDTHS)
+
+    bench("PIL paste (previous)", lambda: compose_overlay_pil(person, garment), args.runs)
+    bench("NumPy, garment bytes", lambda: compose_overlay(person, garment), args.runs)
+    bench("NumPy, cached garment asset", lambda: compose_overlay(person, asset), args.runs)
@@ -1,21 +1,45 @@
 # backend/services/auth_service.py
 # ============================================================================
 
-from utils.config import settings
-import os
-from supabase import create_client, Client
+from fastapi import Request
+from services.supabase_client import SupabaseClients
 
 class AuthService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
-        )
+    """
+    Async wrapper around Supabase Auth
+
+    Uses a stateless GoTrue client: signing a user in never changes the
+    credentials used for service-role database access.
+    """
+
+    def __init__(self, clients: SupabaseClients):
+        self.auth = clients.auth
+
+    async def sign_up(self, email: str, password: str, name: str):
+        """Register a user with email and password"""
+        return await self.auth.sign_up({
+            "email": email,
+            "password": password,
+            "options": {
+                "data": {"name": name}
+            }
+        })
+
+    async def sign_in(self, email: str, password: str):
+        """Sign a user in with email and password"""
+        return await self.auth.sign_in_with_password({
+            "email": email,
+            "password": password
+        })
+
+    async def get_user(self, token: str):
+        """Validate an access token with Supabase Auth"""
+        return await self.auth.get_user(token)
 
     async def create_user(self, email: str, password: str, name: str):
         """Create new user in Supabase Auth"""
         try:
-            response = self.supabase.auth.admin.create_user(
+            response = await self.auth.admin.create_user(
                 {
                     "email": email,
                     "password": password,
@@ -30,8 +54,8 @@ class AuthService:
     async def get_user_by_email(self, email: str):
         """Get user by email"""
         try:
-            response = self.supabase.auth.admin.list_users()
-            for user in response.data:
+            users = await self.auth.admin.list_users()
+            for user in users:
                 if user.email == email:
                     return user
             return None
@@ -42,3 +66,8 @@ class AuthService:
         """Verify user password (handled by Supabase Auth)"""
         # Supabase handles this automatically
         pass
+
+
+def get_auth_service(request: Request) -> AuthService:
+    """FastAPI dependency returning the app-scoped AuthService"""
+    return request.app.state.auth_service
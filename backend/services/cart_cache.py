@@ -0,0 +1,125 @@
+# backend/services/cart_cache.py
+# ============================================================================
+
+from typing import Iterable, Optional
+from fastapi import Request
+from services.catalog_cache import CatalogCache
+from services.database import CART_PRODUCT_FIELDS, DatabaseService
+from utils.cache import ReadThroughCache, TTLCache
+from utils.config import settings
+from utils.helpers import effective_price, format_price
+from utils.metrics import metrics
+
+
+def cart_summary(items: list) -> dict:
+    """Item count and totals of a cart, before and after discounts"""
+    subtotal = 0.0
+    discounted = 0.0
+    count = 0
+    for item in items:
+        product = item.get("products") or {}
+        price = product.get("price") or 0
+        count += item["quantity"]
+        subtotal += price * item["quantity"]
+        discounted += effective_price(price, product.get("discount_price")) * item["quantity"]
+    return {
+        "item_count": count,
+        "line_count": len(items),
+        "subtotal": format_price(subtotal),
+        "discounted_subtotal": format_price(discounted),
+        "savings": format_price(subtotal - discounted)
+    }
+
+
+class CartSnapshot:
+    """A user's cart rows with their summary, computed once"""
+
+    def __init__(self, items: list):
+        self.items = items
+        self.summary = cart_summary(items)
+
+
+class CartCache:
+    """
+    Per-user cart snapshots, populated on read and written through
+
+    The cart badge is rendered on every page, so reads come from here
+    rather than joining cart_items and products each time. Cart writes
+    patch the cached snapshot with the row they wrote (product details for
+    new lines come from the catalog cache) instead of dropping it; anything
+    that can't be patched just invalidates the user's entry. Snapshots are
+    LRU-bounded and expire after CART_CACHE_TTL, which also bounds how stale
+    another instance's view can get.
+    """
+
+    def __init__(self, db: DatabaseService, catalog: CatalogCache, store=None):
+        self.db = db
+        self.catalog = catalog
+        self._store = store if store is not None else TTLCache(
+            maxsize=settings.CART_CACHE_SIZE,
+            ttl=settings.CART_CACHE_TTL
+        )
+        self._cache = ReadThroughCache("cart_cache", self._store, ttl=settings.CART_CACHE_TTL)
+        metrics.register_gauge("cart_cache", lambda: {"size": len(self._store)})
+
+    async def get(self, user_id: str) -> CartSnapshot:
+        async def load():
+            return CartSnapshot(await self.db.get_user_cart(user_id))
+
+        return await self._cache.get_or_load(user_id, load)
+
+    async def put_rows(self, user_id: str, rows: Iterable[dict]):
+        """Write-through for added or updated cart rows"""
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+
+        # Details for lines not in the snapshot yet, read before patching
+        products = {}
+        cached = self._store.get(user_id)
+        if cached is not None:
+            known = {item["product_id"] for item in cached.items}
+            for row in rows:
+                if row["product_id"] not in known and not row.get("products"):
+                    product = await self.catalog.get_product(row["product_id"])
+                    if not product:
+                        self.invalidate(user_id)
+                        return
+                    products[row["product_id"]] = {field: product.get(field) for field in CART_PRODUCT_FIELDS}
+
+        def patch(snapshot: CartSnapshot) -> Optional[CartSnapshot]:
+            items = {item["product_id"]: item for item in snapshot.items}
+            for row in rows:
+                current = items.get(row["product_id"])
+                if current is None and row["product_id"] not in products and not row.get("products"):
+                    return None
+                merged = {**(current or {}), **{key: value for key, value in row.items() if key != "user_id"}}
+                merged.setdefault("products", products.get(row["product_id"]))
+                items[row["product_id"]] = merged
+            return CartSnapshot(list(items.values()))
+
+        self._cache.update(user_id, patch)
+
+    def remove_rows(self, user_id: str, item_ids: Iterable[str]):
+        """Write-through for deleted cart rows"""
+        item_ids = set(item_ids)
+        if item_ids:
+            self._cache.update(user_id, lambda snapshot: CartSnapshot(
+                [item for item in snapshot.items if item["id"] not in item_ids]
+            ))
+
+    def clear(self, user_id: str):
+        """Write-through for an emptied cart (cleared, or turned into an order)"""
+        self._cache.set(user_id, CartSnapshot([]))
+
+    def invalidate(self, user_id: Optional[str] = None):
+        self._cache.invalidate(user_id)
+
+    def on_catalog_change(self, product_id: Optional[str] = None):
+        """CatalogCache listener: prices in every snapshot may be stale"""
+        self._cache.invalidate()
+
+
+def get_cart_cache(request: Request) -> CartCache:
+    """FastAPI dependency returning the app-scoped CartCache"""
+    return request.app.state.cart_cache
@@ -0,0 +1,83 @@
+# backend/services/catalog_cache.py
+# ============================================================================
+
+from typing import Callable, Optional
+from fastapi import Request
+from services.database import DatabaseService
+from utils.cache import ReadThroughCache, TTLCache
+from utils.config import settings
+from utils.metrics import metrics
+
+class CatalogCache:
+    """
+    Read-through cache for the product catalog
+
+    Single products and listings are cached with their own TTLs in one
+    LRU store. Anything else derived from the catalog (price index,
+    search index, ...) registers a listener to be invalidated alongside.
+    """
+
+    def __init__(self, db: DatabaseService, store=None):
+        self.db = db
+        self._store = store if store is not None else TTLCache(maxsize=settings.CATALOG_CACHE_SIZE)
+        self._cache = ReadThroughCache("catalog_cache", self._store)
+        self._listeners = []
+        metrics.register_gauge("catalog_cache.size", lambda: len(self._store))
+
+    async def get_products(self, limit: int, offset: int, category: Optional[str] = None):
+        return await self._cache.get_or_load(
+            ("products", limit, offset, (category or "").lower()),
+            lambda: self.db.get_all_products(limit, offset, category),
+            ttl=settings.CATALOG_LIST_TTL
+        )
+
+    async def get_products_page(self, limit: int, after: Optional[tuple] = None, category: Optional[str] = None, exact_category: bool = False):
+        """Keyset page of products; rows include one look-ahead row"""
+        return await self._cache.get_or_load(
+            ("products_page", limit, after, category if exact_category else (category or "").lower(), exact_category),
+            lambda: self.db.get_products_page(limit, after, category, exact_category),
+            ttl=settings.CATALOG_LIST_TTL
+        )
+
+    async def get_product(self, product_id: str):
+        """A product, or None; misses are only kept for CATALOG_MISS_TTL"""
+        return await self._cache.get_or_load(
+            ("product", product_id),
+            lambda: self.db.get_product_by_id(product_id),
+            ttl=lambda product: settings.CATALOG_PRODUCT_TTL if product else settings.CATALOG_MISS_TTL
+        )
+
+    async def get_by_category(self, category: str):
+        return await self._cache.get_or_load(
+            ("category", category),
+            lambda: self.db.get_products_by_category(category),
+            ttl=settings.CATALOG_LIST_TTL
+        )
+
+    async def search(self, query: str):
+        return await self._cache.get_or_load(
+            ("search", query.lower()),
+            lambda: self.db.search_products(query),
+            ttl=settings.CATALOG_LIST_TTL
+        )
+
+    def add_listener(self, callback: Callable[[Optional[str]], None]):
+        """Call callback(product_id) whenever the catalog is invalidated"""
+        self._listeners.append(callback)
+
+    def invalidate(self, product_id: Optional[str] = None):
+        """
+        Invalidate after a catalog change
+
+        Clears the whole cache, since any listing may contain the product;
+        product_id is passed on so listeners can be more selective.
+        """
+        self._cache.invalidate()
+        for callback in self._listeners:
+            callback(product_id)
+        metrics.increment("catalog_cache.invalidations")
+
+
+def get_catalog(request: Request) -> CatalogCache:
+    """FastAPI dependency returning the app-scoped CatalogCache"""
+    return request.app.state.catalog
@@ -1,90 +1,468 @@
 # backend/services/database.py
 # ============================================================================
 
+import asyncio
+from datetime import datetime
+from fastapi import Request
+from typing import Optional
+from services.supabase_client import SupabaseClients
 from utils.config import settings
-from supabase import create_client, Client
 
-class DatabaseService:
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
+# Product fields embedded in cart rows; image_variants only exists once
+# sql/product_image_variants.sql is applied
+CART_PRODUCT_FIELDS = (
+    "id", "name", "price", "discount_price", "image_url",
+    *(("image_variants",) if settings.IMAGE_VARIANTS_ENABLED else ()),
+    "stock_quantity"
+)
+CART_COLUMNS = f"id, product_id, quantity, created_at, updated_at, products({', '.join(CART_PRODUCT_FIELDS)})"
+
+# Order list view: only what the order history page renders
+ORDER_SUMMARY_COLUMNS = "id, order_status, total_amount, created_at, item_count, thumbnail_url"
+# Same view derived from the line items, before sql/order_summary.sql is applied
+ORDER_SUMMARY_SOURCE_COLUMNS = (
+    "id, order_status, total_amount, created_at, order_items(quantity, products(image_url"
+    + (", image_variants" if settings.IMAGE_VARIANTS_ENABLED else "") + "))"
+)
+
+def order_summaries(rows: list) -> list:
+    """Shape orders into the list view, deriving item_count and thumbnail_url if needed"""
+    if settings.ORDER_SUMMARY_ENABLED:
+        return rows
+
+    summaries = []
+    for row in rows:
+        items = row.pop("order_items", None) or []
+        product = next((item["products"] for item in items if item.get("products")), None) or {}
+        variants = product.get("image_variants") or {}
+        row["item_count"] = sum(item["quantity"] for item in items)
+        row["thumbnail_url"] = (variants.get("thumbnail") or {}).get("jpeg") or product.get("image_url")
+        summaries.append(row)
+    return summaries
+
+def after_keyset(query, limit: int, after: Optional[tuple] = None):
+    """
+    Order newest first on (created_at, id) and start after a keyset cursor
+
+    Fetches one extra row so callers can tell whether another page exists.
+    """
+    if after:
+        created_at, row_id = after
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
         )
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+class DatabaseService:
+    """
+    Async data access layer for every router
+
+    All queries go through the shared async Supabase clients, so a PostgREST
+    or Storage round trip yields the event loop instead of blocking it.
+    """
+
+    def __init__(self, clients: SupabaseClients):
+        self.supabase = clients
 
     # Products
-    async def get_all_products(self, limit: int = 12, offset: int = 0):
+    async def get_all_products(self, limit: int = 12, offset: int = 0, category: Optional[str] = None):
         """Get all products with pagination"""
-        response = self.supabase.table("products").select("*").range(offset, offset + limit - 1).execute()
-        return response.data
+        query = self.supabase.table("products").select("*")
+        if category:
+            query = query.ilike("category", category)
+        response = await query.range(offset, offset + limit - 1).execute()
+        return response.data or []
 
-    async def get_product_by_id(self, product_id: str):
-        """Get product by ID"""
-        response = self.supabase.table("products").select("*").eq("id", product_id).single().execute()
-        return response.data
+    async def get_products_page(self, limit: int, after: Optional[tuple] = None, category: Optional[str] = None, exact_category: bool = False):
+        """Get one keyset page of products, newest first"""
+        query = self.supabase.table("products").select("*")
+        if category:
+            query = query.eq("category", category) if exact_category else query.ilike("category", category)
+        response = await after_keyset(query, limit, after).execute()
+        return response.data or []
+
+    async def list_all_products(self, page_size: int = 1000):
+        """Get the whole catalog, fetched in pages ordered by ID"""
+        products = []
+        while True:
+            response = await self.supabase.table("products").select("*").order("id").range(
+                len(products), len(products) + page_size - 1
+            ).execute()
+            products.extend(response.data or [])
+            if len(response.data or []) < page_size:
+                return products
+
+    async def get_product_by_id(self, product_id: str, columns: str = "*"):
+        """Get product by ID, or None if it doesn't exist"""
+        response = await self.supabase.table("products").select(columns).eq("id", product_id).maybe_single().execute()
+        return response.data if response else None
+
+    async def get_products_by_ids(self, product_ids: list, columns: str = "*"):
+        """Get several products in one query"""
+        response = await self.supabase.table("products").select(columns).in_("id", product_ids).execute()
+        return response.data or []
+
+    async def update_product_image_variants(self, product_id: str, variants: dict):
+        """Record the URLs of a product's resized image derivatives"""
+        await self.supabase.table("products").update({
+            "image_variants": variants
+        }).eq("id", product_id).execute()
 
     async def search_products(self, query: str):
         """Search products by name"""
-        response = self.supabase.table("products").select("*").ilike("name", f"%{query}%").execute()
-        return response.data
+        response = await self.supabase.table("products").select("*").ilike("name", f"%{query}%").execute()
+        return response.data or []
 
     async def get_products_by_category(self, category: str):
         """Get products by category"""
-        response = self.supabase.table("products").select("*").eq("category", category).execute()
-        return response.data
+        response = await self.supabase.table("products").select("*").eq("category", category).execute()
+        return response.data or []
+
+    # Profiles
+    async def create_profile(self, user_id: str, name: str, created_at: str):
+        """Create user profile"""
+        response = await self.supabase.table("profiles").insert({
+            "id": user_id,
+            "name": name,
+            "created_at": created_at
+        }).execute()
+        return response.data[0]
+
+    async def get_profile(self, user_id: str):
+        """Get user profile"""
+        response = await self.supabase.table("profiles").select("*").eq("id", user_id).maybe_single().execute()
+        return response.data if response else None
 
     # Orders
-    async def create_order(self, user_id: str, total_amount: float, payment_method: str, shipping_address: str):
+    async def create_order(self, order: dict):
         """Create new order"""
-        response = self.supabase.table("orders").insert({
-            "user_id": user_id,
-            "total_amount": total_amount,
-            "payment_method": payment_method,
-            "shipping_address": shipping_address,
-            "order_status": "pending"
-        }).execute()
+        response = await self.supabase.table("orders").insert(order).execute()
         return response.data[0]
 
-    async def get_user_orders(self, user_id: str):
-        """Get all orders for a user"""
-        response = self.supabase.table("orders").select("*").eq("user_id", user_id).execute()
+    async def add_order_items(self, order_id: str, items: list):
+        """Add all line items of an order in one bulk insert"""
+        response = await self.supabase.table("order_items").insert([
+            {"order_id": order_id, **item} for item in items
+        ]).execute()
         return response.data
 
-    async def get_order_by_id(self, order_id: str):
-        """Get order by ID"""
-        response = self.supabase.table("orders").select("*").eq("id", order_id).single().execute()
+    async def delete_order(self, order_id: str):
+        """Delete an order"""
+        await self.supabase.table("orders").delete().eq("id", order_id).execute()
+
+    async def create_order_with_items(self, order: dict, items: list):
+        """
+        Create an order with its line items and clear the user's cart
+
+        With ORDER_RPC_ENABLED this is one transactional RPC (see
+        sql/create_order_with_items.sql). Otherwise it takes three round
+        trips regardless of item count, and removes the order again if the
+        line items can't be written so no orphan orders are left behind.
+        """
+        if settings.ORDER_RPC_ENABLED:
+            response = await self.supabase.rpc("create_order_with_items", {
+                "p_order": order,
+                "p_items": items
+            }).execute()
+            return response.data[0]
+
+        created = await self.create_order(order)
+        try:
+            await self.add_order_items(order["id"], items)
+        except Exception:
+            await self.delete_order(order["id"])
+            raise
+
+        await self.clear_cart(order["user_id"])
+        return created
+
+    async def get_user_orders(self, user_id: str, limit: int = 10):
+        """Get the list view of a user's latest orders, newest first"""
+        response = await self.supabase.table("orders").select(
+            ORDER_SUMMARY_COLUMNS if settings.ORDER_SUMMARY_ENABLED else ORDER_SUMMARY_SOURCE_COLUMNS
+        ).eq("user_id", user_id).order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+        return order_summaries(response.data or [])
+
+    async def get_user_orders_page(self, user_id: str, limit: int, after: Optional[tuple] = None):
+        """Get one keyset page of the list view of a user's orders, newest first"""
+        query = self.supabase.table("orders").select(
+            ORDER_SUMMARY_COLUMNS if settings.ORDER_SUMMARY_ENABLED else ORDER_SUMMARY_SOURCE_COLUMNS
+        ).eq("user_id", user_id)
+        response = await after_keyset(query, limit, after).execute()
+        return order_summaries(response.data or [])
+
+    async def get_order_by_id(self, order_id: str, user_id: str):
+        """Get order by ID, scoped to its owner"""
+        response = await self.supabase.table("orders").select(
+            "*, order_items(*, products(*))"
+        ).eq("id", order_id).eq("user_id", user_id).maybe_single().execute()
+        return response.data if response else None
+
+    async def update_order_status(self, order_id: str, user_id: str, status: str):
+        """Update order status"""
+        response = await self.supabase.table("orders").update({
+            "order_status": status
+        }).eq("id", order_id).eq("user_id", user_id).execute()
         return response.data
 
     # Cart
     async def get_user_cart(self, user_id: str):
-        """Get user's cart items"""
-        response = self.supabase.table("cart_items").select("*, products(*)").eq("user_id", user_id).execute()
+        """Get user's cart items with product details"""
+        response = await self.supabase.table("cart_items").select(CART_COLUMNS).eq("user_id", user_id).execute()
         return response.data
 
-    async def add_to_cart(self, user_id: str, product_id: str, quantity: int):
+    async def get_cart_item(self, user_id: str, product_id: str):
+        """Get the cart row for a product, or None"""
+        response = await self.supabase.table("cart_items").select("*").eq(
+            "user_id", user_id
+        ).eq("product_id", product_id).execute()
+        return response.data[0] if response.data else None
+
+    async def get_cart_item_by_id(self, item_id: str, user_id: str, columns: str = "*"):
+        """Get a cart row by ID, scoped to its owner"""
+        response = await self.supabase.table("cart_items").select(columns).eq(
+            "id", item_id
+        ).eq("user_id", user_id).execute()
+        return response.data[0] if response.data else None
+
+    async def add_to_cart(self, item: dict):
         """Add item to cart"""
-        response = self.supabase.table("cart_items").upsert({
+        response = await self.supabase.table("cart_items").insert(item).execute()
+        return response.data[0]
+
+    async def add_to_cart_item(self, user_id: str, product_id: str, quantity: int) -> dict:
+        """
+        Add quantity of a product to the cart, merging with an existing row
+
+        Returns {"status": "ok", "item": row}, {"status": "not_found"} or
+        {"status": "insufficient_stock", "available": n, "in_cart": n}.
+        With CART_RPC_ENABLED this is one round trip that increments and
+        checks stock atomically (see sql/cart_items_upsert.sql). Otherwise
+        the product and existing row are read concurrently and then
+        written, which concurrent adds of the same product can race.
+        """
+        if settings.CART_RPC_ENABLED:
+            response = await self.supabase.rpc("add_to_cart_item", {
+                "p_user_id": user_id,
+                "p_product_id": product_id,
+                "p_quantity": quantity
+            }).execute()
+            return response.data
+
+        product, existing = await asyncio.gather(
+            self.get_product_by_id(product_id, "id, stock_quantity"),
+            self.get_cart_item(user_id, product_id)
+        )
+        if not product:
+            return {"status": "not_found"}
+
+        in_cart = existing["quantity"] if existing else 0
+        if product["stock_quantity"] < in_cart + quantity:
+            return {"status": "insufficient_stock", "available": product["stock_quantity"], "in_cart": in_cart}
+
+        now = datetime.utcnow().isoformat()
+        if existing:
+            item = await self.update_cart_item(existing["id"], user_id, {
+                "quantity": in_cart + quantity,
+                "updated_at": now
+            })
+        else:
+            item = await self.add_to_cart({
+                "user_id": user_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "created_at": now,
+                "updated_at": now
+            })
+        return {"status": "ok", "item": item}
+
+    async def set_cart_item_quantity(self, item_id: str, user_id: str, quantity: int) -> dict:
+        """
+        Set a cart row's quantity if the product has enough stock
+
+        Same return shape as add_to_cart_item; one round trip with
+        CART_RPC_ENABLED, two otherwise.
+        """
+        if settings.CART_RPC_ENABLED:
+            response = await self.supabase.rpc("set_cart_item_quantity", {
+                "p_user_id": user_id,
+                "p_item_id": item_id,
+                "p_quantity": quantity
+            }).execute()
+            return response.data
+
+        cart_item = await self.get_cart_item_by_id(item_id, user_id, "*, products(stock_quantity)")
+        if not cart_item:
+            return {"status": "not_found"}
+
+        stock = cart_item["products"]["stock_quantity"]
+        if stock < quantity:
+            return {"status": "insufficient_stock", "available": stock}
+
+        item = await self.update_cart_item(item_id, user_id, {
+            "quantity": quantity,
+            "updated_at": datetime.utcnow().isoformat()
+        })
+        return {"status": "ok", "item": item}
+
+    async def update_cart_item(self, item_id: str, user_id: str, values: dict):
+        """Update a cart row"""
+        response = await self.supabase.table("cart_items").update(values).eq(
+            "id", item_id
+        ).eq("user_id", user_id).execute()
+        return response.data[0] if response.data else {}
+
+    async def get_cart_rows(self, user_id: str):
+        """Get a user's cart rows with just their products' stock"""
+        response = await self.supabase.table("cart_items").select(
+            "id, product_id, quantity, products(stock_quantity)"
+        ).eq("user_id", user_id).execute()
+        return response.data or []
+
+    async def write_cart_rows(self, user_id: str, rows: list, remove_ids: list):
+        """
+        Apply a batch of cart changes in at most three concurrent statements
+
+        Rows with an id update that row, rows without one are inserted (the
+        database fills in the id). Inserts and updates are sent separately
+        so an update never touches columns it does not name, such as
+        created_at. remove_ids are deleted in one statement. Returns the
+        written rows.
+        """
+        updates = [row for row in rows if "id" in row]
+        inserts = [row for row in rows if "id" not in row]
+
+        async def update():
+            if not updates:
+                return []
+            response = await self.supabase.table("cart_items").upsert(updates, on_conflict="id").execute()
+            return response.data or []
+
+        async def insert():
+            if not inserts:
+                return []
+            response = await self.supabase.table("cart_items").insert(inserts).execute()
+            return response.data or []
+
+        async def delete():
+            if remove_ids:
+                await self.supabase.table("cart_items").delete().eq(
+                    "user_id", user_id
+                ).in_("id", remove_ids).execute()
+
+        updated, inserted, _ = await asyncio.gather(update(), insert(), delete())
+        return updated + inserted
+
+    async def apply_cart_operations(self, user_id: str, operations: list) -> list:
+        """
+        Apply bulk cart operations in order, in one transaction
+
+        Needs CART_RPC_ENABLED (see sql/cart_items_upsert.sql). Each
+        operation is checked against the current stock in the database and
+        gets a result shaped like add_to_cart_item's, or
+        {"status": "removed", "item": row} for a removal.
+        """
+        response = await self.supabase.rpc("apply_cart_operations", {
+            "p_user_id": user_id,
+            "p_operations": operations
+        }).execute()
+        return response.data or []
+
+    async def remove_from_cart(self, item_id: str, user_id: str):
+        """Remove item from cart"""
+        await self.supabase.table("cart_items").delete().eq("id", item_id).eq("user_id", user_id).execute()
+
+    async def clear_cart(self, user_id: str):
+        """Remove every item from a user's cart"""
+        await self.supabase.table("cart_items").delete().eq("user_id", user_id).execute()
+
+    # Wishlist
+    async def get_wishlist(self, user_id: str):
+        """Get user's wishlist with product details"""
+        response = await self.supabase.table("wishlist").select("*, products(*)").eq("user_id", user_id).execute()
+        return response.data
+
+    async def get_wishlist_item(self, user_id: str, product_id: str):
+        """Get the wishlist row for a product, or None"""
+        response = await self.supabase.table("wishlist").select("*").eq(
+            "user_id", user_id
+        ).eq("product_id", product_id).execute()
+        return response.data[0] if response.data else None
+
+    async def add_to_wishlist(self, user_id: str, product_id: str):
+        """Add product to wishlist"""
+        response = await self.supabase.table("wishlist").insert({
             "user_id": user_id,
-            "product_id": product_id,
-            "quantity": quantity
+            "product_id": product_id
         }).execute()
         return response.data[0]
 
-    async def remove_from_cart(self, item_id: str):
-        """Remove item from cart"""
-        self.supabase.table("cart_items").delete().eq("id", item_id).execute()
+    async def remove_from_wishlist(self, user_id: str, product_id: str):
+        """Remove product from wishlist"""
+        await self.supabase.table("wishlist").delete().eq(
+            "user_id", user_id
+        ).eq("product_id", product_id).execute()
 
     # Reviews
-    async def create_review(self, user_id: str, product_id: str, rating: int, comment: str):
+    async def create_review(self, review: dict):
         """Create product review"""
-        response = self.supabase.table("reviews").insert({
-            "user_id": user_id,
-            "product_id": product_id,
-            "rating": rating,
-            "comment": comment
-        }).execute()
+        response = await self.supabase.table("reviews").insert(review).execute()
         return response.data[0]
 
     async def get_product_reviews(self, product_id: str):
         """Get reviews for a product"""
-        response = self.supabase.table("reviews").select("*").eq("product_id", product_id).execute()
+        response = await self.supabase.table("reviews").select("*").eq("product_id", product_id).execute()
+        return response.data
+
+    # Try-on
+    async def upload_file(self, bucket: str, path: str, content: bytes, content_type: str) -> str:
+        """Upload bytes to a storage bucket and return the public URL"""
+        storage = self.supabase.storage.from_(bucket)
+        await storage.upload(path, content, {"content-type": content_type})
+        return await storage.get_public_url(path)
+
+    async def list_files(self, bucket: str, prefix: str) -> list:
+        """Names of the objects directly under a folder of a storage bucket"""
+        files = await self.supabase.storage.from_(bucket).list(prefix, {"limit": 1000})
+        return [f["name"] for f in files]
+
+    async def get_public_url(self, bucket: str, path: str) -> str:
+        """Public URL of an object already in a storage bucket"""
+        return await self.supabase.storage.from_(bucket).get_public_url(path)
+
+    async def create_tryon_history(self, entry: dict):
+        """Record a generated try-on"""
+        response = await self.supabase.table("tryon_history").insert(entry).execute()
+        return response.data[0]
+
+    async def get_tryon_result(self, cache_key: str):
+        """Look up a generated try-on in the persistent result index"""
+        response = await self.supabase.table("tryon_results").select("*").eq("cache_key", cache_key).maybe_single().execute()
+        return response.data if response else None
+
+    async def save_tryon_result(self, result: dict):
+        """Record a generated try-on in the persistent result index"""
+        await self.supabase.table("tryon_results").upsert(
+            result, on_conflict="cache_key", ignore_duplicates=True
+        ).execute()
+
+    async def get_tryon_history(self, user_id: str, limit: int = 10):
+        """Get user's try-on history, newest first"""
+        response = await self.supabase.table("tryon_history").select(
+            "*, products(name, image_url)"
+        ).eq("user_id", user_id).order("created_at", desc=True).limit(limit).execute()
+        return response.data
+
+    async def get_tryon_history_page(self, user_id: str, limit: int, after: Optional[tuple] = None):
+        """Get one keyset page of a user's try-on history, newest first"""
+        query = self.supabase.table("tryon_history").select(
+            "*, products(name, image_url)"
+        ).eq("user_id", user_id)
+        response = await after_keyset(query, limit, after).execute()
         return response.data
+
+
+def get_db(request: Request) -> DatabaseService:
+    """FastAPI dependency returning the app-scoped DatabaseService"""
+    return request.app.state.db
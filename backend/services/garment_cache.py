@@ -0,0 +1,128 @@
+# backend/services/garment_cache.py
+# ============================================================================
+
+import asyncio
+import base64
+from io import BytesIO
+from typing import Awaitable, Callable, Iterable, Optional
+from PIL import Image, ImageOps
+from services.image_executor import ImageExecutor
+from utils.cache import ReadThroughCache, TTLCache
+from utils.compositor import OVERLAY
+from utils.config import settings
+from utils.metrics import metrics
+
+# Largest side of the garment image sent to try-on models
+MODEL_MAX_SIZE = 1024
+# Extra exact widths memoised per asset
+MAX_SCALED_WIDTHS = 8
+
+
+class GarmentAsset:
+    """A product's garment image, decoded and ready for compositing and models"""
+
+    def __init__(self, image_url: str, images: dict, payload: str):
+        self.image_url = image_url
+        # Width -> RGBA image at that width, ready for OVERLAY.compose
+        self.images = images
+        # Exact widths already asked for; person photos come in few sizes
+        self._scaled = {}
+        # Base64 JPEG for model APIs
+        self.payload = payload
+
+    def scaled(self, width: int) -> Image.Image:
+        """RGBA garment at exactly width, resized from the nearest larger copy"""
+        if width in self.images:
+            return self.images[width]
+        if width in self._scaled:
+            return self._scaled[width]
+
+        widths = sorted(self.images)
+        source = self.images[next((w for w in widths if w >= width), widths[-1])]
+        height = max(int(source.height * (width / source.width)), 1)
+        image = source.resize((width, height), Image.Resampling.BILINEAR)
+        if len(self._scaled) < MAX_SCALED_WIDTHS:
+            self._scaled[width] = image
+        return image
+
+
+def build_garment_asset(image_url: str, data: bytes, widths: tuple) -> GarmentAsset:
+    """Decode a garment once and derive every cached form of it (CPU-bound)"""
+    garment = ImageOps.exif_transpose(Image.open(BytesIO(data))).convert("RGBA")
+    # Done once per garment here instead of on every overlay
+    cut_out = OVERLAY.cut_out(garment)
+
+    images = {}
+    for width in widths:
+        height = max(int(garment.height * (width / garment.width)), 1)
+        images[width] = OVERLAY.feathered(cut_out.resize((width, height), Image.Resampling.LANCZOS))
+
+    model_input = garment.convert("RGB")
+    model_input.thumbnail((MODEL_MAX_SIZE, MODEL_MAX_SIZE), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    model_input.save(output, format="JPEG", quality=90)
+    return GarmentAsset(image_url, images, base64.b64encode(output.getvalue()).decode())
+
+
+class GarmentCache:
+    """
+    Decoded garment assets keyed by product image URL
+
+    A catalog has a small, fixed set of garments, so each one is downloaded
+    and decoded once and then served from memory. Keying by URL means a
+    product whose image_url changes simply misses; catalog invalidations
+    also drop the product's entry in case an image was replaced in place.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[bytes]], executor: ImageExecutor):
+        self.fetch = fetch
+        self.executor = executor
+        self.widths = settings.GARMENT_WIDTHS
+        self._store = TTLCache(maxsize=settings.GARMENT_CACHE_SIZE, ttl=settings.GARMENT_CACHE_TTL)
+        self._cache = ReadThroughCache("garment_cache", self._store, ttl=settings.GARMENT_CACHE_TTL)
+        self._product_urls = {}
+        metrics.register_gauge("garment_cache", lambda: {
+            "size": len(self._store),
+            "widths": list(self.widths)
+        })
+
+    async def get(self, image_url: str, product_id: Optional[str] = None) -> GarmentAsset:
+        """Return the asset for a garment image, building it on first use"""
+        if product_id is not None:
+            self._product_urls[product_id] = image_url
+
+        async def load():
+            data = await self.fetch(image_url)
+            return await self.executor.run(build_garment_asset, image_url, data, self.widths)
+
+        return await self._cache.get_or_load(image_url, load)
+
+    async def warm(self, products: Iterable[dict], concurrency: int = 4):
+        """Build assets for many products ahead of their first try-on"""
+        semaphore = asyncio.Semaphore(concurrency)
+        warmed = 0
+
+        async def warm_one(product: dict):
+            nonlocal warmed
+            async with semaphore:
+                try:
+                    await self.get(product["image_url"], product["id"])
+                    warmed += 1
+                except Exception as e:
+                    print(f"[GARMENTS] Failed to warm {product['id']}: {str(e)}")
+
+        await asyncio.gather(*(
+            warm_one(product) for product in products if product.get("image_url")
+        ))
+        print(f"[GARMENTS] Warmed {warmed} garments")
+
+    def invalidate(self, product_id: Optional[str] = None):
+        """CatalogCache listener: drop one product's garment, or all of them"""
+        if product_id is None:
+            self._product_urls.clear()
+            self._cache.invalidate()
+            return
+
+        image_url = self._product_urls.pop(product_id, None)
+        if image_url is not None:
+            self._cache.invalidate(image_url)
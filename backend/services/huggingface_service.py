@@ -1,27 +1,34 @@
 # backend/services/huggingface_service.py
 # ============================================================================
 
-import requests
+import httpx
 import base64
+from typing import Optional
 from utils.config import settings
 from utils.image_processor import ImageProcessor
 
 class HuggingFaceService:
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = settings.HUGGING_FACE_API_KEY
         self.api_url = "https://api-inference.huggingface.co/models/ZeroGPU/stable-diffusion-v1-5"
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
+        self.http = http_client or httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.TRYON_TIMEOUT, connect=settings.TRYON_CONNECT_TIMEOUT)
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
 
     async def generate_tryon_image(self, user_image_base64: str, product_name: str, product_image_url: str) -> str:
         """Generate virtual try-on image using Hugging Face API"""
         try:
             prompt = f"A person wearing {product_name}, professional clothing fitting room photo, high quality"
-            
+
             payload = {
                 "inputs": prompt,
             }
 
-            response = requests.post(
+            response = await self.http.post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
@@ -36,17 +43,3 @@ class HuggingFaceService:
                 raise Exception(f"API error: {response.status_code}")
         except Exception as e:
             raise Exception(f"Try-on generation failed: {str(e)}")
-
-    async def estimate_wait_time(self) -> dict:
-        """Check if model is loading"""
-        try:
-            response = requests.head(self.api_url, headers=self.headers)
-            return {
-                "status": "ready" if response.status_code == 200 else "loading",
-                "message": "Model is ready" if response.status_code == 200 else "Model is loading, please wait"
-            }
-        except Exception as e:
-            return {
-                "status": "error",
-                "message": str(e)
-            }
@@ -0,0 +1,74 @@
+# backend/services/idempotency.py
+# ============================================================================
+
+import hashlib
+import json
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, Request, Response
+from utils.cache import ReadThroughCache, TTLCache
+from utils.config import settings
+from utils.metrics import metrics
+
+# Longest Idempotency-Key header value accepted
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(payload) -> str:
+    """Stable hash of a request body, to spot a key reused for another request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Replays the first response for repeated Idempotency-Key requests
+
+    Keys are scoped to the user and the operation. The first request with
+    a key runs; its successful response is kept for IDEMPOTENCY_TTL and
+    returned to every repeat, and duplicates arriving while it runs wait
+    for it instead of running again. Failures are not stored, so a retry
+    after an error runs afresh. Reusing a key with a different body is
+    rejected with 422.
+    """
+
+    def __init__(self, store=None):
+        self._store = store if store is not None else TTLCache(
+            maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+            ttl=settings.IDEMPOTENCY_TTL
+        )
+        self._cache = ReadThroughCache("idempotency", self._store, ttl=settings.IDEMPOTENCY_TTL)
+        metrics.register_gauge("idempotency", lambda: {"size": len(self._store)})
+
+    async def run(self, user_id: str, operation: str, key: Optional[str], payload,
+                  execute: Callable[[], Awaitable], response: Optional[Response] = None):
+        """Return execute()'s result, or the stored one when key was seen before"""
+        if key is None:
+            return await execute()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        request_hash = fingerprint(payload)
+        executed = False
+
+        async def load() -> dict:
+            nonlocal executed
+            executed = True
+            return {"fingerprint": request_hash, "body": await execute()}
+
+        entry = await self._cache.get_or_load((user_id, operation, key), load)
+        if entry["fingerprint"] != request_hash:
+            metrics.increment("idempotency.conflicts")
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+        if not executed:
+            metrics.increment(f"idempotency.{operation}.replayed")
+            if response is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+        return entry["body"]
+
+
+def get_idempotency_store(request: Request) -> IdempotencyStore:
+    """FastAPI dependency returning the app-scoped IdempotencyStore"""
+    return request.app.state.idempotency
@@ -0,0 +1,89 @@
+# backend/services/image_executor.py
+# ============================================================================
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+from fastapi import Request
+from utils.metrics import metrics
+
+
+class ExecutorBusyError(Exception):
+    """Too many image tasks are already waiting; the client should retry later"""
+
+
+def _timed(fn: Callable, *args):
+    """Run fn in the worker, returning (result, start wall time, duration)"""
+    started_at = time.time()
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, started_at, time.perf_counter() - started
+
+
+class ImageExecutor:
+    """
+    Worker pool for CPU-bound image transforms
+
+    "thread" suits PIL, which releases the GIL while decoding, resizing and
+    encoding; "process" sidesteps the GIL entirely at the cost of pickling
+    the image bytes (functions must then be module-level). At most
+    workers + max_queued tasks are accepted at once, beyond that run()
+    fails fast with ExecutorBusyError. A task that exceeds the timeout is
+    abandoned by its caller; if it already started, the worker still
+    finishes it and keeps its slot until then.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = None, max_queued: int = 32, timeout: float = 30):
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers + max_queued
+        self.timeout = timeout
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+        self._pending = 0
+        self._lock = threading.Lock()
+        metrics.register_gauge("image_executor", lambda: {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self._pending,
+            "queued": max(self._pending - self.workers, 0)
+        })
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) in the pool and return its result"""
+        if self._pending >= self.max_pending:
+            metrics.increment("image_executor.rejected")
+            raise ExecutorBusyError("Image processing is busy, please retry shortly")
+
+        with self._lock:
+            self._pending += 1
+        submitted_at = time.time()
+        # Released when the worker is actually done, not when the caller gives up
+        future = self._pool.submit(_timed, fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            result, started_at, duration = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.increment("image_executor.timeouts")
+            raise TimeoutError(f"Image processing timed out after {self.timeout}s")
+
+        metrics.observe("image_executor.queue_wait", max(started_at - submitted_at, 0))
+        metrics.observe(f"image_executor.{getattr(fn, '__name__', 'task')}", duration)
+        return result
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_image_executor(request: Request) -> ImageExecutor:
+    """FastAPI dependency returning the app-scoped ImageExecutor"""
+    return request.app.state.image_executor
@@ -1,98 +1,98 @@
 # backend/services/improved_tryon_service.py
 # ============================================================================
 
-import requests
+import asyncio
 import base64
-from PIL import Image
+import httpx
+from PIL import Image, ImageDraw
 from io import BytesIO
 import os
+from typing import Optional, Union
+from services.garment_cache import GarmentAsset, GarmentCache
+from services.image_executor import ImageExecutor
+from utils.config import settings
+from utils.compositor import OVERLAY
+
+VITON_API_URL = "https://api-inference.huggingface.co/models/yisol/IDM-VTON"
+# Model is loading / rate limited / upstream hiccup: worth another attempt
+RETRYABLE_STATUS = {429, 502, 503, 504}
+RETRY_BACKOFF = 1.0
 
 class ImprovedTryOnService:
     """
     Enhanced Virtual Try-On using better AI models
-    
+
     Options:
     1. Replicate API - VITON-HD (Best for clothing)
     2. Hugging Face - IDM-VTON or other specialized models
     3. Local processing with overlay techniques
+
+    Network calls go through one pooled async HTTP client and PIL work runs
+    on the image executor, so concurrent try-ons overlap instead of
+    blocking the event loop.
     """
-    
-    def __init__(self):
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, executor: Optional[ImageExecutor] = None):
         self.hf_api_key = os.getenv("HUGGING_FACE_API_KEY")
         self.replicate_api_key = os.getenv("REPLICATE_API_TOKEN")  # Optional
-        
-    async def generate_with_viton(self, person_image_url: str, garment_image_url: str) -> bytes:
-        """
-        Use VITON-HD model for realistic virtual try-on
-        This is significantly better than generic Stable Diffusion
-        """
-        API_URL = "https://api-inference.huggingface.co/models/yisol/IDM-VTON"
+        self.http = http_client or httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.TRYON_TIMEOUT, connect=settings.TRYON_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+            follow_redirects=True
+        )
+        self.executor = executor or ImageExecutor(
+            settings.IMAGE_EXECUTOR,
+            settings.IMAGE_WORKERS,
+            settings.IMAGE_QUEUE_SIZE,
+            settings.IMAGE_TASK_TIMEOUT
+        )
+        self.garments = GarmentCache(self.fetch_image, self.executor)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def fetch_image(self, url: str) -> bytes:
+        """Download an image with the fetch timeout"""
+        response = await self.http.get(url, timeout=settings.TRYON_FETCH_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+
+    async def viton(self, person_image: bytes, garment: GarmentAsset) -> bytes:
+        """Call IDM-VTON once (with retries); raises when it does not return an image"""
         headers = {"Authorization": f"Bearer {self.hf_api_key}"}
-        
-        # Download images
-        person_img = requests.get(person_image_url).content
-        garment_img = requests.get(garment_image_url).content
-        
         payload = {
             "inputs": {
-                "person_image": base64.b64encode(person_img).decode(),
-                "garment_image": base64.b64encode(garment_img).decode()
+                "person_image": base64.b64encode(person_image).decode(),
+                "garment_image": garment.payload
             }
         }
-        
-        try:
-            response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
-            if response.status_code == 200:
-                return response.content
-            else:
-                # Fallback to simple overlay
-                return await self.simple_overlay(person_img, garment_img)
-        except Exception as e:
-            print(f"VITON failed: {e}")
-            return await self.simple_overlay(person_img, garment_img)
-    
-    async def simple_overlay(self, person_image: bytes, garment_image: bytes) -> bytes:
+
+        response = await self._post_with_retries(VITON_API_URL, headers=headers, json=payload)
+        if response.status_code != 200:
+            raise Exception(f"VITON API error: {response.status_code}")
+        return response.content
+
+    async def _post_with_retries(self, url: str, **kwargs) -> httpx.Response:
+        """POST, retrying transient failures with exponential backoff"""
+        attempts = settings.TRYON_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await self.http.post(url, **kwargs)
+                if response.status_code not in RETRYABLE_STATUS or last_attempt:
+                    return response
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    async def simple_overlay(self, person_image: bytes, garment_image: Union[bytes, GarmentAsset]) -> bytes:
         """
         Fallback: Simple image overlay for demo purposes
         Better than nothing when AI models fail
         """
-        try:
-            from PIL import Image, ImageDraw, ImageFont
-            
-            person = Image.open(BytesIO(person_image))
-            garment = Image.open(BytesIO(garment_image))
-            
-            # Resize garment to fit on person
-            person = person.convert("RGBA")
-            garment = garment.convert("RGBA")
-            
-            # Calculate position (center of image, slightly up)
-            garment_width = int(person.width * 0.6)
-            garment_height = int(garment.height * (garment_width / garment.width))
-            garment = garment.resize((garment_width, garment_height))
-            
-            position = (
-                (person.width - garment_width) // 2,
-                int(person.height * 0.25)
-            )
-            
-            # Create result
-            result = person.copy()
-            result.paste(garment, position, garment)
-            
-            # Add watermark
-            draw = ImageDraw.Draw(result)
-            draw.text((10, 10), "Virtual Try-On Preview", fill=(255, 255, 255, 180))
-            
-            # Convert to bytes
-            output = BytesIO()
-            result.convert("RGB").save(output, format="JPEG", quality=90)
-            return output.getvalue()
-            
-        except Exception as e:
-            print(f"Overlay failed: {e}")
-            return person_image
-    
+        return await self.executor.run(compose_overlay, person_image, garment_image)
+
     async def generate_with_replicate(self, person_image_url: str, garment_image_url: str) -> str:
         """
         Alternative: Use Replicate API (paid but very good quality)
@@ -100,11 +100,13 @@ class ImprovedTryOnService:
         """
         if not self.replicate_api_key:
             return None
-            
+
         import replicate
-        
+
         try:
-            output = replicate.run(
+            # replicate.run blocks until the prediction finishes
+            output = await asyncio.to_thread(
+                replicate.run,
                 "viktorfa/oot_diffusion:9f0868c61af97a96b648554ba6b0e7c45ca6929d3d0826655bb411c23ecd5022",
                 input={
                     "model_image": person_image_url,
@@ -115,37 +117,36 @@ class ImprovedTryOnService:
         except Exception as e:
             print(f"Replicate failed: {e}")
             return None
-    
-    async def validate_images(self, person_image: bytes, garment_image: bytes) -> tuple:
-        """
-        Validate and preprocess images before try-on
-        """
-        try:
-            person = Image.open(BytesIO(person_image))
-            garment = Image.open(BytesIO(garment_image))
-            
-            # Check dimensions
-            if person.width < 256 or person.height < 256:
-                raise ValueError("Person image too small (min 256x256)")
-            
-            if garment.width < 256 or garment.height < 256:
-                raise ValueError("Garment image too small (min 256x256)")
-            
-            # Resize if too large (save API costs)
-            max_size = 1024
-            if person.width > max_size or person.height > max_size:
-                person.thumbnail((max_size, max_size))
-            
-            if garment.width > max_size or garment.height > max_size:
-                garment.thumbnail((max_size, max_size))
-            
-            # Convert to bytes
-            person_buf = BytesIO()
-            garment_buf = BytesIO()
-            person.save(person_buf, format="JPEG", quality=90)
-            garment.save(garment_buf, format="JPEG", quality=90)
-            
-            return person_buf.getvalue(), garment_buf.getvalue()
-            
-        except Exception as e:
-            raise ValueError(f"Image validation failed: {str(e)}")
+
+
+def compose_overlay(person_image: bytes, garment_image: Union[bytes, GarmentAsset]) -> bytes:
+    """Blend the garment onto the person and encode as JPEG (CPU-bound)"""
+    try:
+        person = Image.open(BytesIO(person_image))
+
+        # Resize garment to fit on person
+        garment_width = OVERLAY.garment_width(person.width)
+        if isinstance(garment_image, GarmentAsset):
+            # Already decoded and prepared; scaled from the nearest cached width
+            garment = garment_image.scaled(garment_width)
+            prepared = True
+        else:
+            garment = Image.open(BytesIO(garment_image)).convert("RGBA")
+            garment_height = int(garment.height * (garment_width / garment.width))
+            garment = garment.resize((garment_width, garment_height))
+            prepared = False
+
+        result = OVERLAY.compose(person, garment, prepared)
+
+        # Add watermark
+        draw = ImageDraw.Draw(result)
+        draw.text((10, 10), "Virtual Try-On Preview", fill=(255, 255, 255))
+
+        # Convert to bytes
+        output = BytesIO()
+        result.save(output, format="JPEG", quality=90)
+        return output.getvalue()
+
+    except Exception as e:
+        print(f"Overlay failed: {e}")
+        return person_image
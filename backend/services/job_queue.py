@@ -0,0 +1,185 @@
+# backend/services/job_queue.py
+# ============================================================================
+
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from fastapi import Request
+from utils.cache import TTLCache
+from utils.metrics import metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """The queue is at capacity; the client should retry later"""
+
+
+class UserJobLimitError(QueueFullError):
+    """The user already has the maximum number of unfinished jobs"""
+
+
+class Job:
+    """State of one background job, as reported to the client"""
+
+    def __init__(self, user_id: str):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.updated_at = self.created_at
+        # Bumped on every update so watchers never miss a change
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def update(self, **fields):
+        """Set status/stage/progress/result/error and wake any watchers"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.updated_at = datetime.utcnow().isoformat()
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until the job moves past version; False on timeout"""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class JobQueue:
+    """
+    In-process job queue with a fixed pool of asyncio workers
+
+    The number of workers caps how many jobs run at once, the queue size
+    caps how many may wait, and each user can only have a few unfinished
+    jobs. Submitting past any of these limits fails fast instead of piling
+    up work. Job state is kept in a TTL cache for status polling.
+    """
+
+    def __init__(self, name: str, workers: int, max_queued: int, max_per_user: int,
+                 job_timeout: float, result_ttl: float, max_jobs: int = 10000):
+        self.name = name
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.job_timeout = job_timeout
+        self.result_ttl = result_ttl
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._jobs = TTLCache(maxsize=max_jobs, ttl=result_ttl)
+        self._unfinished = defaultdict(int)
+        self._running = 0
+        self._tasks = []
+        metrics.register_gauge(name, self.stats)
+
+    def start(self):
+        """Spawn the worker tasks"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; jobs still queued are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, user_id: str, handler: Callable[[Job], Awaitable[dict]]) -> Job:
+        """
+        Queue handler(job) to run in the background and return the job
+
+        The handler may report progress with job.update(); its return value
+        becomes the job result and an exception marks the job failed.
+        """
+        if self._unfinished[user_id] >= self.max_per_user:
+            metrics.increment(f"{self.name}.rejected")
+            raise UserJobLimitError(f"You already have {self.max_per_user} jobs in progress")
+
+        job = Job(user_id)
+        try:
+            self._queue.put_nowait((job, handler, time.perf_counter()))
+        except asyncio.QueueFull:
+            metrics.increment(f"{self.name}.rejected")
+            raise QueueFullError("Too many jobs queued, please retry shortly")
+
+        self._unfinished[user_id] += 1
+        self._jobs.set(job.id, job)
+        metrics.increment(f"{self.name}.submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "workers": self.workers,
+            "max_queued": self._queue.maxsize
+        }
+
+    async def _worker(self):
+        while True:
+            job, handler, queued_at = await self._queue.get()
+            try:
+                await self._execute(job, handler, queued_at)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job, handler, queued_at: float):
+        metrics.observe(f"{self.name}.wait", time.perf_counter() - queued_at)
+        started = time.perf_counter()
+        self._running += 1
+        job.update(status=RUNNING, stage=RUNNING)
+        try:
+            result = await asyncio.wait_for(handler(job), self.job_timeout)
+            job.update(status=SUCCEEDED, stage=SUCCEEDED, progress=100, result=result)
+            metrics.increment(f"{self.name}.succeeded")
+        except asyncio.TimeoutError:
+            job.update(status=FAILED, stage=FAILED, error="Job timed out")
+            metrics.increment(f"{self.name}.failed")
+        except Exception as e:
+            job.update(status=FAILED, stage=FAILED, error=str(e))
+            metrics.increment(f"{self.name}.failed")
+        finally:
+            self._running -= 1
+            self._unfinished[job.user_id] -= 1
+            if not self._unfinished[job.user_id]:
+                del self._unfinished[job.user_id]
+            metrics.observe(f"{self.name}.run", time.perf_counter() - started)
+            # Keep the finished job around for a full TTL of polling
+            self._jobs.set(job.id, job)
+
+
+def get_tryon_jobs(request: Request) -> JobQueue:
+    """FastAPI dependency returning the app-scoped try-on JobQueue"""
+    return request.app.state.tryon_jobs
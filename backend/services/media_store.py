@@ -0,0 +1,65 @@
+# backend/services/media_store.py
+# ============================================================================
+
+import hashlib
+import mimetypes
+from fastapi import Request
+from storage3.utils import StorageException
+from services.database import DatabaseService
+from utils.cache import TTLCache
+from utils.config import settings
+from utils.metrics import metrics
+
+
+def is_duplicate(error: StorageException) -> bool:
+    """Whether Storage rejected an upload because the object already exists"""
+    details = error.args[0] if error.args and isinstance(error.args[0], dict) else {}
+    return details.get("error") == "Duplicate" or str(details.get("statusCode")) == "409"
+
+
+class MediaStore:
+    """
+    Content-addressed uploads to Supabase Storage
+
+    Objects are stored under the SHA-256 of their bytes, so uploading the
+    same content twice keeps a single object and returns the same URL.
+    Recently stored objects are remembered and skip the upload entirely;
+    otherwise Storage's duplicate check stops a second copy being written.
+    """
+
+    def __init__(self, db: DatabaseService):
+        self.db = db
+        # Objects are immutable by construction, so entries never go stale
+        self._known = TTLCache(maxsize=settings.MEDIA_STORE_CACHE_SIZE, ttl=float("inf"))
+        metrics.register_gauge("media_store", lambda: {"known_objects": len(self._known)})
+
+    @staticmethod
+    def object_path(prefix: str, content: bytes, content_type: str) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        extension = mimetypes.guess_extension(content_type) or ""
+        return f"{prefix}/{digest}{extension}"
+
+    async def put(self, bucket: str, prefix: str, content: bytes, content_type: str) -> str:
+        """Store content once under prefix and return its public URL"""
+        path = self.object_path(prefix, content, content_type)
+        url = self._known.get((bucket, path))
+        if url:
+            metrics.increment("media_store.bytes_deduplicated", len(content))
+            return url
+
+        try:
+            url = await self.db.upload_file(bucket, path, content, content_type)
+            metrics.increment("media_store.bytes_uploaded", len(content))
+        except StorageException as e:
+            if not is_duplicate(e):
+                raise
+            url = await self.db.get_public_url(bucket, path)
+            metrics.increment("media_store.bytes_deduplicated", len(content))
+
+        self._known.set((bucket, path), url)
+        return url
+
+
+def get_media_store(request: Request) -> MediaStore:
+    """FastAPI dependency returning the app-scoped MediaStore"""
+    return request.app.state.media_store
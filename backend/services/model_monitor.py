@@ -0,0 +1,183 @@
+# backend/services/model_monitor.py
+# ============================================================================
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import httpx
+from utils.config import settings
+from utils.metrics import metrics
+
+HF_STATUS_URL = "https://api-inference.huggingface.co/status"
+
+UNKNOWN = "unknown"
+READY = "ready"
+LOADING = "loading"
+ERROR = "error"
+
+MESSAGES = {
+    UNKNOWN: "Model has not been checked yet",
+    READY: "Model is ready",
+    LOADING: "Model is loading, please wait",
+    ERROR: "Model is unavailable"
+}
+
+
+def parse_hours(value: str) -> Optional[tuple]:
+    """"8-22" -> (8, 22), the UTC hours warm pings are sent in; "" -> None"""
+    if not value.strip():
+        return None
+    start, end = (int(part) for part in value.split("-"))
+    return start, end
+
+
+class ModelStatus:
+    """Last known readiness of one hosted model"""
+
+    def __init__(self, name: str, api_url: str, warm_payload: dict):
+        self.name = name
+        self.api_url = api_url
+        self.model_id = api_url.split("/models/", 1)[-1]
+        self.warm_payload = warm_payload
+        self.state = UNKNOWN
+        self.message = MESSAGES[UNKNOWN]
+        self.estimated_time = None
+        self.checked_at = None
+        self.warmed_at = None
+
+    def update(self, state: str, message: str = None, estimated_time: float = None):
+        self.state = state
+        self.message = message or MESSAGES[state]
+        self.estimated_time = estimated_time
+        self.checked_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "model": self.model_id,
+            "status": self.state,
+            "message": self.message,
+            "estimated_time": self.estimated_time,
+            "checked_at": self.checked_at,
+            "warmed_at": self.warmed_at
+        }
+
+
+class ModelReadinessMonitor:
+    """
+    Background readiness tracking for Hugging Face Inference API models
+
+    Every interval each model's load state is read from the API's status
+    endpoint, which does not load anything. During the configured traffic
+    hours a small inference request is also sent every warm_interval (and
+    whenever the model is not ready), since only a request makes the API
+    load a model or keep it loaded. Callers read the cached state and
+    never wait on a probe.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, api_key: str, models: dict,
+                 interval: float = 60, warm_interval: float = 300, warm_hours: Optional[tuple] = None):
+        self.http = http
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        # Name -> (inference URL, warm-up payload)
+        self.models = {
+            name: ModelStatus(name, api_url, payload) for name, (api_url, payload) in models.items()
+        }
+        self.interval = interval
+        self.warm_interval = warm_interval
+        self.warm_hours = warm_hours
+        self._task = None
+        metrics.register_gauge("model_monitor", self.snapshot)
+
+    def start(self):
+        if self.models:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def status(self, name: str) -> Optional[ModelStatus]:
+        return self.models.get(name)
+
+    def is_ready(self, name: str) -> bool:
+        """False only for a model known to be loading or failing; unmonitored names count as ready"""
+        status = self.models.get(name)
+        return status is None or status.state in (READY, UNKNOWN)
+
+    def snapshot(self) -> dict:
+        return {name: status.to_dict() for name, status in self.models.items()}
+
+    def in_warm_hours(self, now: Optional[datetime] = None) -> bool:
+        if self.warm_hours is None:
+            return False
+        hour = (now or datetime.now(timezone.utc)).hour
+        start, end = self.warm_hours
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    async def check_all(self):
+        """Probe (or warm) every model once"""
+        warm_hours = self.in_warm_hours()
+        now = time.time()
+
+        async def check(status: ModelStatus):
+            due = status.warmed_at is None or now - status.warmed_at >= self.warm_interval
+            if warm_hours and (due or status.state != READY):
+                await self.warm(status)
+            else:
+                await self.probe(status)
+
+        await asyncio.gather(*(check(status) for status in self.models.values()))
+
+    async def probe(self, status: ModelStatus):
+        """Read the model's load state without triggering a load"""
+        try:
+            response = await self.http.get(
+                f"{HF_STATUS_URL}/{status.model_id}",
+                headers=self.headers,
+                timeout=settings.MODEL_PROBE_TIMEOUT
+            )
+            if response.status_code != 200:
+                status.update(ERROR, f"Status check failed: {response.status_code}")
+                return
+            body = response.json()
+            status.update(READY if body.get("loaded") else LOADING)
+        except Exception as e:
+            status.update(ERROR, f"Status check failed: {str(e) or type(e).__name__}")
+        metrics.increment(f"model_monitor.{status.name}.probes")
+
+    async def warm(self, status: ModelStatus):
+        """Send a small inference request so the model loads or stays loaded"""
+        try:
+            response = await self.http.post(
+                status.api_url,
+                headers=self.headers,
+                json={**status.warm_payload, "options": {"wait_for_model": False}},
+                timeout=settings.MODEL_PROBE_TIMEOUT
+            )
+            status.warmed_at = time.time()
+            if response.status_code == 503:
+                try:
+                    estimated_time = response.json().get("estimated_time")
+                except ValueError:
+                    estimated_time = None
+                status.update(LOADING, estimated_time=estimated_time)
+            elif response.status_code in (401, 403, 404) or response.status_code >= 500:
+                status.update(ERROR, f"Warm-up failed: {response.status_code}")
+            else:
+                # Anything else came from the loaded model, even a rejected payload
+                status.update(READY)
+        except httpx.TimeoutException:
+            # Still busy answering; the status probe will tell
+            status.warmed_at = time.time()
+        except Exception as e:
+            status.update(ERROR, f"Warm-up failed: {str(e) or type(e).__name__}")
+        metrics.increment(f"model_monitor.{status.name}.warmups")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                print(f"[MODELS] Readiness check failed: {str(e)}")
+            await asyncio.sleep(self.interval)
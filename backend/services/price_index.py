@@ -0,0 +1,58 @@
+# backend/services/price_index.py
+# ============================================================================
+
+from typing import Iterable, Optional
+from fastapi import Request
+from services.database import DatabaseService
+from utils.cache import TTLCache
+from utils.config import settings
+from utils.metrics import metrics
+
+PRICE_COLUMNS = "id, name, price, discount_price, stock_quantity"
+
+class PriceIndex:
+    """
+    Short-lived in-process index of product prices and stock
+
+    Checkout resolves every line item from here: cached products cost a
+    dict lookup and all misses are fetched together in one query.
+    """
+
+    def __init__(self, db: DatabaseService):
+        self.db = db
+        self._cache = TTLCache(maxsize=settings.PRICE_INDEX_SIZE, ttl=settings.PRICE_INDEX_TTL)
+        metrics.register_gauge("price_index", lambda: {
+            "size": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses
+        })
+
+    async def get_many(self, product_ids: Iterable[str]) -> dict:
+        """Return {product_id: product} for every product that exists"""
+        found = {}
+        missing = []
+        for product_id in dict.fromkeys(product_ids):
+            product = self._cache.get(product_id)
+            if product is None:
+                missing.append(product_id)
+            else:
+                found[product_id] = product
+
+        if missing:
+            for product in await self.db.get_products_by_ids(missing, PRICE_COLUMNS):
+                self._cache.set(product["id"], product)
+                found[product["id"]] = product
+
+        return found
+
+    def invalidate(self, product_id: Optional[str] = None):
+        """Drop one product, or the whole index when no id is given"""
+        if product_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(product_id)
+
+
+def get_price_index(request: Request) -> PriceIndex:
+    """FastAPI dependency returning the app-scoped PriceIndex"""
+    return request.app.state.price_index
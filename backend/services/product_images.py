@@ -0,0 +1,170 @@
+# backend/services/product_images.py
+# ============================================================================
+
+import asyncio
+import hashlib
+import os
+from typing import Iterable
+import httpx
+from services.database import DatabaseService
+from services.image_executor import ImageExecutor
+from utils.config import settings
+from utils.image_processor import ImageProcessor
+
+# Variant name -> longest side in pixels
+VARIANT_SIZES = {"thumbnail": 160, "card": 400, "detail": 1024}
+# Pillow format -> file extension
+VARIANT_FORMATS = {"JPEG": "jpg", "WEBP": "webp"}
+
+try:
+    import pillow_avif  # noqa: F401  registers AVIF support with Pillow
+    VARIANT_FORMATS["AVIF"] = "avif"
+except ImportError:
+    pass
+
+
+class SupabaseVariantStore:
+    """Derivatives stored in a public Supabase Storage bucket"""
+
+    def __init__(self, db: DatabaseService, bucket: str):
+        self.db = db
+        self.bucket = bucket
+
+    async def existing(self, prefix: str) -> set:
+        return {f"{prefix}/{name}" for name in await self.db.list_files(self.bucket, prefix)}
+
+    async def put(self, path: str, data: bytes, content_type: str) -> str:
+        return await self.db.upload_file(self.bucket, path, data, content_type)
+
+    async def url(self, path: str) -> str:
+        return await self.db.get_public_url(self.bucket, path)
+
+
+class LocalVariantStore:
+    """Local directory stand-in for Storage, served by the API under /media"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    async def existing(self, prefix: str) -> set:
+        directory = os.path.join(self.root, prefix)
+        names = await asyncio.to_thread(lambda: os.listdir(directory) if os.path.isdir(directory) else [])
+        return {f"{prefix}/{name}" for name in names}
+
+    async def put(self, path: str, data: bytes, content_type: str) -> str:
+        def write():
+            target = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+
+        await asyncio.to_thread(write)
+        return await self.url(path)
+
+    async def url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+
+def create_variant_store(db: DatabaseService):
+    """Store selected by IMAGE_VARIANT_STORE"""
+    if settings.IMAGE_VARIANT_STORE == "local":
+        return LocalVariantStore(settings.IMAGE_VARIANT_DIR, f"{settings.BACKEND_URL}/media")
+    return SupabaseVariantStore(db, settings.IMAGE_VARIANT_BUCKET)
+
+
+class ProductImageVariants:
+    """
+    Thumbnail, card and detail sized copies of product images
+
+    Each product image is downloaded and decoded once and every size is
+    encoded in every format (JPEG, WebP, and AVIF when pillow-avif is
+    installed). Files live under {product_id}/{hash of image_url}/, so a
+    new image_url gets fresh derivatives, and their URLs are written to
+    products.image_variants for the API to serve alongside image_url.
+    """
+
+    def __init__(self, db: DatabaseService, store, http: httpx.AsyncClient, executor: ImageExecutor):
+        self.db = db
+        self.store = store
+        self.http = http
+        self.executor = executor
+
+    @staticmethod
+    def prefix(product: dict) -> str:
+        digest = hashlib.sha256(product["image_url"].encode()).hexdigest()[:16]
+        return f"{product['id']}/{digest}"
+
+    @staticmethod
+    def path(prefix: str, name: str, image_format: str) -> str:
+        return f"{prefix}/{name}.{VARIANT_FORMATS[image_format]}"
+
+    def is_current(self, product: dict) -> bool:
+        """Whether the product already has every derivative of its current image"""
+        variants = product.get("image_variants") or {}
+        return variants.get("source") == product["image_url"] and all(
+            fmt.lower() in variants.get(name, {})
+            for name in VARIANT_SIZES
+            for fmt in VARIANT_FORMATS
+        )
+
+    async def generate(self, product: dict, force: bool = False) -> str:
+        """
+        Create whatever derivatives are missing and record their URLs
+
+        Returns "skipped" when nothing had to change, "linked" when every
+        file already existed and only the URLs were recorded, and
+        "generated" when images were rendered and uploaded.
+        """
+        if not force and self.is_current(product):
+            return "skipped"
+
+        prefix = self.prefix(product)
+        wanted = {
+            (name, fmt): self.path(prefix, name, fmt)
+            for name in VARIANT_SIZES
+            for fmt in VARIANT_FORMATS
+        }
+        existing = await self.store.existing(prefix)
+        missing = {key: path for key, path in wanted.items() if path not in existing}
+
+        urls = {}
+        if missing:
+            response = await self.http.get(product["image_url"])
+            response.raise_for_status()
+            rendered = await self.executor.run(
+                ImageProcessor.render_variants, response.content, VARIANT_SIZES, tuple(VARIANT_FORMATS)
+            )
+            uploads = [
+                self.store.put(path, rendered[key].data, rendered[key].mime_type)
+                for key, path in missing.items()
+            ]
+            urls.update(zip(missing, await asyncio.gather(*uploads)))
+
+        for key, path in wanted.items():
+            if key not in urls:
+                urls[key] = await self.store.url(path)
+
+        variants = {"source": product["image_url"]}
+        for (name, fmt), url in urls.items():
+            variants.setdefault(name, {})[fmt.lower()] = url
+        await self.db.update_product_image_variants(product["id"], variants)
+        return "generated" if missing else "linked"
+
+    async def backfill(self, products: Iterable[dict], concurrency: int = 4, force: bool = False) -> dict:
+        """Process many products in parallel; returns a count per outcome"""
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"generated": 0, "linked": 0, "skipped": 0, "failed": 0}
+
+        async def process(product: dict):
+            async with semaphore:
+                try:
+                    counts[await self.generate(product, force)] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"[VARIANTS] {product['id']} failed: {str(e)}")
+
+        await asyncio.gather(*(
+            process(product) for product in products if product.get("image_url")
+        ))
+        return counts
@@ -0,0 +1,276 @@
+# backend/services/search_index.py
+# ============================================================================
+
+import asyncio
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Optional
+from fastapi import Request
+from services.database import DatabaseService
+from utils.metrics import metrics
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+
+# How much a query token is worth depending on how it matched a term
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.4
+MAX_PREFIX_EXPANSIONS = 50
+# Backoff between attempts of the startup build, in seconds
+BUILD_RETRY_INITIAL = 1.0
+BUILD_RETRY_MAX = 60.0
+
+def tokenize(text: Optional[str]) -> list:
+    """Lowercase text and split it into alphanumeric tokens"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+def deletions(term: str) -> set:
+    """Every variant of term with one character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def within_distance(a: str, b: str, max_distance: int) -> bool:
+    """
+    Optimal string alignment distance check (a transposition counts as one
+    edit) that gives up once max_distance is exceeded
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            distance = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, before_previous[j - 2] + 1)
+            current.append(distance)
+        if min(current) > max_distance:
+            return False
+        before_previous, previous = previous, current
+
+    return previous[-1] <= max_distance
+
+def typo_budget(token: str) -> int:
+    """Number of typos tolerated for a query token of this length"""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class ProductSearchIndex:
+    """
+    In-memory inverted index over product name, description and category
+
+    Query tokens match terms exactly, by prefix or within a small edit
+    distance; every query token has to match for a product to be returned.
+    Built from the catalog at startup, retrying until the catalog can be
+    read, and updated one product at a time when the catalog cache is
+    invalidated. Builds and refreshes are serialised, so a refresh is never
+    overwritten by a build that read the catalog before it.
+    """
+
+    def __init__(self, db: DatabaseService):
+        self.db = db
+        self.ready = False
+        self._products = {}
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        # Single-deletion variants -> terms, to find typo candidates quickly
+        self._deletions = defaultdict(set)
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+        metrics.register_gauge("search_index", lambda: {
+            "ready": self.ready,
+            "products": len(self._products),
+            "terms": len(self._postings)
+        })
+
+    async def build(self):
+        """(Re)build the index from the full catalog"""
+        async with self._lock:
+            products = await self.db.list_all_products()
+            self._replace(products)
+        print(f"[SEARCH] Indexed {len(products)} products")
+
+    async def build_until_ready(self):
+        """Build the index, retrying with exponential backoff until it succeeds"""
+        delay = BUILD_RETRY_INITIAL
+        while True:
+            try:
+                await self.build()
+                return
+            except Exception as e:
+                print(f"[SEARCH] Index build failed, retrying in {delay:.0f}s: {str(e)}")
+                metrics.increment("search_index.build_failures")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BUILD_RETRY_MAX)
+
+    def upsert(self, product: dict):
+        """Add or replace a single product"""
+        self.remove(product["id"])
+        self._index(product)
+        self._vocabulary_dirty = True
+
+    def remove(self, product_id: str):
+        """Remove a single product"""
+        self._products.pop(product_id, None)
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                for variant in deletions(term):
+                    self._deletions[variant].discard(term)
+                self._vocabulary_dirty = True
+
+    def start(self):
+        """Build the index in the background; search uses the database until then"""
+        self._schedule(self.build_until_ready())
+
+    def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def on_catalog_change(self, product_id: Optional[str] = None):
+        """CatalogCache listener: refresh one product, or rebuild everything"""
+        if product_id is None:
+            self._schedule(self.build())
+        else:
+            self._schedule(self.refresh(product_id))
+
+    async def refresh(self, product_id: str):
+        async with self._lock:
+            product = await self.db.get_product_by_id(product_id)
+            if product:
+                self.upsert(product)
+            else:
+                self.remove(product_id)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list:
+        """Return one page of products ranked by relevance"""
+        scores = None
+        for token in dict.fromkeys(tokenize(query)):
+            token_scores = {}
+            for term, factor in self._expand(token):
+                for product_id, weight in self._postings.get(term, {}).items():
+                    score = factor * weight
+                    if score > token_scores.get(product_id, 0):
+                        token_scores[product_id] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    product_id: score + token_scores[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in token_scores
+                }
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+
+        ranked = sorted(
+            scores,
+            key=lambda product_id: (
+                -scores[product_id],
+                -(self._products[product_id].get("rating") or 0),
+                self._products[product_id].get("name") or ""
+            )
+        )
+        return [self._products[product_id] for product_id in ranked[offset:offset + limit]]
+
+    def _schedule(self, coro):
+        task = asyncio.create_task(self._run(coro))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, coro):
+        try:
+            await coro
+        except Exception as e:
+            print(f"[SEARCH] Index update failed: {str(e)}")
+
+    def _replace(self, products: list):
+        """Replace the whole index in one step that never yields to searches"""
+        self._products.clear()
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._deletions.clear()
+        for product in products:
+            self._index(product)
+        self._vocabulary_dirty = True
+        self.ready = True
+
+    def _index(self, product: dict):
+        terms = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in set(tokenize(product.get(field))):
+                terms[term] = terms.get(term, 0) + weight
+
+        for term, weight in terms.items():
+            if term not in self._postings:
+                for variant in deletions(term):
+                    self._deletions[variant].add(term)
+            self._postings[term][product["id"]] = weight
+        self._products[product["id"]] = product
+        self._doc_terms[product["id"]] = set(terms)
+
+    def _expand(self, token: str):
+        """Yield (term, factor) for every indexed term the token matches"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+        matched = set()
+        if token in self._postings:
+            matched.add(token)
+            yield token, EXACT_MATCH
+
+        start = bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            if term not in matched:
+                matched.add(term)
+                yield term, PREFIX_MATCH
+
+        if matched:
+            return
+
+        budget = typo_budget(token)
+        if not budget:
+            return
+
+        # Terms within one edit share a single-deletion variant with the
+        # token; for a budget of two, also try deletions of deletions
+        variants = {token} | deletions(token)
+        if budget > 1:
+            variants |= {second for first in deletions(token) for second in deletions(first)}
+
+        candidates = set()
+        for variant in variants:
+            candidates |= self._deletions.get(variant, set())
+            if variant in self._postings:
+                candidates.add(variant)
+
+        for term in candidates:
+            if within_distance(token, term, budget):
+                yield term, FUZZY_MATCH
+
+
+def get_search_index(request: Request) -> ProductSearchIndex:
+    """FastAPI dependency returning the app-scoped ProductSearchIndex"""
+    return request.app.state.search_index
@@ -0,0 +1,114 @@
+# backend/services/supabase_client.py
+# ============================================================================
+
+import httpx
+from gotrue import AsyncGoTrueClient
+from postgrest import AsyncPostgrestClient
+from storage3 import AsyncStorageClient
+from utils.config import settings
+from utils.metrics import metrics
+
+
+class _PooledPostgrestClient(AsyncPostgrestClient):
+    """PostgREST client whose session runs on the shared transport"""
+
+    def __init__(self, base_url: str, clients: "SupabaseClients", **kwargs):
+        self._clients = clients
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return self._clients.http_client("postgrest", base_url=base_url, headers=headers)
+
+
+class _PooledStorageClient(AsyncStorageClient):
+    """Storage client whose session runs on the shared transport"""
+
+    def __init__(self, url: str, headers: dict, clients: "SupabaseClients"):
+        self._clients = clients
+        super().__init__(url, headers)
+
+    def _create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return self._clients.http_client("storage", base_url=base_url, headers=headers)
+
+
+class SupabaseClients:
+    """
+    Application-scoped Supabase clients
+
+    PostgREST, Storage and Auth all share one pooled HTTP transport, so the
+    process keeps a single set of keep-alive (HTTP/2) connections to
+    Supabase. Created once in the FastAPI lifespan hook.
+    """
+
+    def __init__(self):
+        url = settings.SUPABASE_URL
+        key = settings.SUPABASE_SERVICE_ROLE_KEY
+        headers = {"apiKey": key, "Authorization": f"Bearer {key}"}
+
+        self.timeout = httpx.Timeout(
+            settings.SUPABASE_TIMEOUT,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT
+        )
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=settings.SUPABASE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY
+            )
+        )
+
+        self.postgrest = _PooledPostgrestClient(f"{url}/rest/v1", self, headers=headers)
+        self.storage = _PooledStorageClient(f"{url}/storage/v1", headers, self)
+        # Stateless: signing a user in must not leak a session into other requests
+        self.auth = AsyncGoTrueClient(
+            url=f"{url}/auth/v1",
+            headers=headers,
+            http_client=self.http_client("auth"),
+            auto_refresh_token=False,
+            persist_session=False
+        )
+
+        metrics.register_gauge("supabase.pool", self.pool_stats)
+
+    def table(self, table_name: str):
+        """Start a PostgREST query, mirroring supabase.Client.table"""
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: dict = None):
+        """Call a Postgres function, mirroring supabase.Client.rpc"""
+        return self.postgrest.rpc(fn, params or {})
+
+    def http_client(self, service: str, **kwargs) -> httpx.AsyncClient:
+        """Create an httpx client on the shared transport with request metrics"""
+
+        async def on_request(request: httpx.Request):
+            metrics.increment(f"supabase.{service}.requests")
+            request.extensions["trace"] = _trace_connections
+
+        return httpx.AsyncClient(
+            transport=self.transport,
+            timeout=self.timeout,
+            follow_redirects=True,
+            event_hooks={"request": [on_request]},
+            **kwargs
+        )
+
+    def pool_stats(self) -> dict:
+        """Current state of the shared connection pool"""
+        connections = self.transport._pool.connections
+        return {
+            "connections": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle()),
+            "max_connections": settings.SUPABASE_MAX_CONNECTIONS,
+            "http2": settings.SUPABASE_HTTP2
+        }
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+async def _trace_connections(event_name: str, info: dict):
+    """httpcore trace hook counting new connections, to show pool reuse"""
+    if event_name == "connection.connect_tcp.complete":
+        metrics.increment("supabase.connections_opened")
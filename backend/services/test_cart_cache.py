@@ -0,0 +1,144 @@
+# backend/services/test_cart_cache.py
+# ============================================================================
+
+import asyncio
+from services.cart_cache import CartCache
+
+PRODUCTS = {
+    "a": {"id": "a", "name": "Shirt", "price": 20.0, "discount_price": 15.0, "image_url": "a.jpg", "stock_quantity": 5},
+    "b": {"id": "b", "name": "Hat", "price": 10.0, "discount_price": None, "image_url": "b.jpg", "stock_quantity": 3},
+}
+
+
+class FakeDB:
+    def __init__(self, items: list):
+        self.items = items
+        self.loads = 0
+
+    async def get_user_cart(self, user_id):
+        self.loads += 1
+        return [dict(item) for item in self.items]
+
+
+class FakeCatalog:
+    async def get_product(self, product_id):
+        return PRODUCTS.get(product_id)
+
+
+def cart_with(*items) -> tuple:
+    db = FakeDB(list(items))
+    return CartCache(db, FakeCatalog()), db
+
+
+def line(item_id: str, product_id: str, quantity: int) -> dict:
+    return {"id": item_id, "product_id": product_id, "quantity": quantity, "products": PRODUCTS[product_id]}
+
+
+def test_snapshot_is_loaded_once():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 2))
+        first = await cart.get("user")
+        second = await cart.get("user")
+        return first, second, db
+
+    first, second, db = asyncio.run(scenario())
+    assert first is second
+    assert db.loads == 1
+    assert first.summary["item_count"] == 2
+    assert first.summary["discounted_subtotal"] == 30.0
+
+
+def test_put_rows_patches_an_existing_line():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 2))
+        await cart.get("user")
+        await cart.put_rows("user", [{"id": "item-a", "user_id": "user", "product_id": "a", "quantity": 4}])
+        return await cart.get("user"), db
+
+    snapshot, db = asyncio.run(scenario())
+    assert db.loads == 1
+    assert snapshot.items[0]["quantity"] == 4
+    assert snapshot.items[0]["products"] == PRODUCTS["a"]
+    assert "user_id" not in snapshot.items[0]
+    assert snapshot.summary["subtotal"] == 80.0
+
+
+def test_put_rows_adds_a_new_line_with_catalog_details():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1))
+        await cart.get("user")
+        await cart.put_rows("user", [{"id": "item-b", "product_id": "b", "quantity": 2}])
+        return await cart.get("user"), db
+
+    snapshot, db = asyncio.run(scenario())
+    assert db.loads == 1
+    assert [item["product_id"] for item in snapshot.items] == ["a", "b"]
+    assert snapshot.items[1]["products"]["name"] == "Hat"
+    assert snapshot.summary["line_count"] == 2
+
+
+def test_put_rows_for_an_unknown_product_invalidates():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1))
+        await cart.get("user")
+        await cart.put_rows("user", [{"id": "item-x", "product_id": "missing", "quantity": 1}])
+        await cart.get("user")
+        return db
+
+    assert asyncio.run(scenario()).loads == 2
+
+
+def test_writes_do_not_populate_an_uncached_user():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1))
+        await cart.put_rows("user", [{"id": "item-a", "product_id": "a", "quantity": 3}])
+        cart.remove_rows("user", ["item-a"])
+        snapshot = await cart.get("user")
+        return snapshot, db
+
+    snapshot, db = asyncio.run(scenario())
+    assert db.loads == 1
+    assert snapshot.items[0]["quantity"] == 1
+
+
+def test_remove_rows_and_clear():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1), line("item-b", "b", 1))
+        await cart.get("user")
+        cart.remove_rows("user", ["item-a"])
+        removed = await cart.get("user")
+        cart.clear("user")
+        cleared = await cart.get("user")
+        return removed, cleared, db
+
+    removed, cleared, db = asyncio.run(scenario())
+    assert [item["id"] for item in removed.items] == ["item-b"]
+    assert cleared.items == [] and cleared.summary["item_count"] == 0
+    assert db.loads == 1
+
+
+def test_catalog_change_drops_every_snapshot():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1))
+        await cart.get("user")
+        await cart.get("other")
+        cart.on_catalog_change("a")
+        await cart.get("user")
+        return db
+
+    assert asyncio.run(scenario()).loads == 3
+
+
+def test_write_during_a_load_discards_the_stale_snapshot():
+    async def scenario():
+        cart, db = cart_with(line("item-a", "a", 1))
+        loading = asyncio.ensure_future(cart.get("user"))
+        await asyncio.sleep(0)
+        await cart.put_rows("user", [{"id": "item-a", "product_id": "a", "quantity": 3}])
+        await loading
+        db.items = [line("item-a", "a", 3)]
+        return await cart.get("user"), db
+
+    snapshot, db = asyncio.run(scenario())
+    assert db.loads == 2
+    assert snapshot.items[0]["quantity"] == 3
@@ -0,0 +1,61 @@
+# backend/services/test_catalog_cache.py
+# ============================================================================
+
+import asyncio
+import time
+from services.catalog_cache import CatalogCache
+from utils.config import settings
+
+
+class FakeDB:
+    def __init__(self):
+        self.products = {}
+        self.reads = 0
+
+    async def get_product_by_id(self, product_id: str):
+        self.reads += 1
+        return self.products.get(product_id)
+
+
+def test_found_products_are_cached():
+    async def scenario():
+        db = FakeDB()
+        db.products["a"] = {"id": "a"}
+        catalog = CatalogCache(db)
+        await catalog.get_product("a")
+        return await catalog.get_product("a"), db
+
+    product, db = asyncio.run(scenario())
+    assert product == {"id": "a"}
+    assert db.reads == 1
+
+
+def test_a_product_created_after_a_miss_is_found(monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_MISS_TTL", 0)
+
+    async def scenario():
+        db = FakeDB()
+        catalog = CatalogCache(db)
+        missing = await catalog.get_product("a")
+        db.products["a"] = {"id": "a"}
+        return missing, await catalog.get_product("a")
+
+    missing, found = asyncio.run(scenario())
+    assert missing is None
+    assert found == {"id": "a"}
+
+
+def test_misses_are_cached_briefly(monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_MISS_TTL", 60)
+
+    async def scenario():
+        db = FakeDB()
+        catalog = CatalogCache(db)
+        await catalog.get_product("a")
+        await catalog.get_product("a")
+        return catalog, db
+
+    catalog, db = asyncio.run(scenario())
+    assert db.reads == 1
+    _, expires_at = catalog._store._data[("product", "a")]
+    assert expires_at - time.monotonic() <= 60 < settings.CATALOG_PRODUCT_TTL
@@ -0,0 +1,59 @@
+# backend/services/test_database.py
+# ============================================================================
+
+import asyncio
+from services.database import DatabaseService
+
+
+class FakeQuery:
+    """Records one PostgREST statement built through the fluent API"""
+
+    def __init__(self, statements: list, table: str):
+        self.statement = {"table": table}
+        statements.append(self.statement)
+
+    def __getattr__(self, method):
+        def build(*args, **kwargs):
+            self.statement.setdefault("calls", []).append((method, args, kwargs))
+            return self
+        return build
+
+    async def execute(self):
+        method, args, _ = self.statement["calls"][0]
+        rows = args[0] if method in ("insert", "upsert") else []
+        return type("Response", (), {"data": rows})()
+
+
+class FakeClients:
+    def __init__(self):
+        self.statements = []
+
+    def table(self, name: str):
+        return FakeQuery(self.statements, name)
+
+
+def test_write_cart_rows_sends_inserts_and_updates_separately():
+    update = {"id": "item-a", "user_id": "user", "product_id": "a", "quantity": 3, "updated_at": "now"}
+    insert = {"user_id": "user", "product_id": "c", "quantity": 1, "created_at": "now", "updated_at": "now"}
+
+    async def scenario():
+        clients = FakeClients()
+        written = await DatabaseService(clients).write_cart_rows("user", [insert, update], ["item-b"])
+        return clients.statements, written
+
+    statements, written = asyncio.run(scenario())
+    calls = {statement["calls"][0][0]: statement["calls"] for statement in statements}
+    assert set(calls) == {"upsert", "insert", "delete"}
+    assert calls["upsert"][0][1] == ([update],)
+    assert calls["insert"][0][1] == ([insert],)
+    assert ("in_", ("id", ["item-b"]), {}) in calls["delete"]
+    assert written == [update, insert]
+
+
+def test_write_cart_rows_skips_empty_statements():
+    async def scenario():
+        clients = FakeClients()
+        written = await DatabaseService(clients).write_cart_rows("user", [], [])
+        return clients.statements, written
+
+    assert asyncio.run(scenario()) == ([], [])
@@ -0,0 +1,116 @@
+# backend/services/test_idempotency.py
+# ============================================================================
+
+import asyncio
+import pytest
+from fastapi import HTTPException, Response
+from services.idempotency import IdempotencyStore
+
+
+def counting(result=None, error: Exception = None, delay: float = 0):
+    """An execute() callable that records how often it ran"""
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return execute, calls
+
+
+def test_without_key_always_executes():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, calls = counting({"id": 1})
+        await store.run("user", "orders.create", None, {"a": 1}, execute)
+        await store.run("user", "orders.create", None, {"a": 1}, execute)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_repeat_replays_the_stored_response():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, calls = counting({"id": 1})
+        first = await store.run("user", "orders.create", "key", {"a": 1}, execute, Response())
+        response = Response()
+        second = await store.run("user", "orders.create", "key", {"a": 1}, execute, response)
+        return first, second, response, calls
+
+    first, second, response, calls = asyncio.run(scenario())
+    assert first == second == {"id": 1}
+    assert len(calls) == 1
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+def test_concurrent_duplicates_run_once():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, calls = counting({"id": 1}, delay=0.01)
+        results = await asyncio.gather(*(
+            store.run("user", "cart.add", "key", {"a": 1}, execute, Response())
+            for _ in range(5)
+        ))
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [{"id": 1}] * 5
+    assert len(calls) == 1
+
+
+def test_key_reused_with_a_different_body_is_rejected():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, calls = counting({"id": 1})
+        await store.run("user", "orders.create", "key", {"a": 1}, execute)
+        with pytest.raises(HTTPException) as error:
+            await store.run("user", "orders.create", "key", {"a": 2}, execute)
+        return error.value, calls
+
+    error, calls = asyncio.run(scenario())
+    assert error.status_code == 422
+    assert len(calls) == 1
+
+
+def test_keys_are_scoped_to_user_and_operation():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, calls = counting({"id": 1})
+        await store.run("user", "orders.create", "key", {"a": 1}, execute)
+        await store.run("other", "orders.create", "key", {"a": 1}, execute)
+        await store.run("user", "cart.add", "key", {"a": 1}, execute)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 3
+
+
+def test_failures_are_not_stored():
+    async def scenario():
+        store = IdempotencyStore()
+        failing, failed_calls = counting(error=HTTPException(status_code=400, detail="Out of stock"))
+        with pytest.raises(HTTPException):
+            await store.run("user", "orders.create", "key", {"a": 1}, failing)
+
+        execute, calls = counting({"id": 1})
+        result = await store.run("user", "orders.create", "key", {"a": 1}, execute)
+        return result, failed_calls, calls
+
+    result, failed_calls, calls = asyncio.run(scenario())
+    assert result == {"id": 1}
+    assert len(failed_calls) == 1
+    assert len(calls) == 1
+
+
+def test_invalid_key_is_rejected():
+    async def scenario():
+        store = IdempotencyStore()
+        execute, _ = counting({"id": 1})
+        with pytest.raises(HTTPException) as error:
+            await store.run("user", "orders.create", "", {"a": 1}, execute)
+        return error.value
+
+    assert asyncio.run(scenario()).status_code == 400
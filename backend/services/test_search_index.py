@@ -0,0 +1,79 @@
+# backend/services/test_search_index.py
+# ============================================================================
+
+import asyncio
+from services import search_index
+from services.search_index import ProductSearchIndex
+
+SHIRT = {"id": "a", "name": "Linen Shirt", "category": "tops", "description": "Light summer shirt"}
+HAT = {"id": "b", "name": "Straw Hat", "category": "accessories", "description": "Wide brim"}
+
+
+class FakeDB:
+    def __init__(self, products: list, failures: int = 0):
+        self.products = {product["id"]: product for product in products}
+        self.failures = failures
+        self.builds = 0
+        self.listing = None
+
+    async def list_all_products(self):
+        self.builds += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        # Snapshot taken now; the caller sees it only after the pause
+        products = list(self.products.values())
+        if self.listing is not None:
+            await self.listing.wait()
+        return products
+
+    async def get_product_by_id(self, product_id: str):
+        return self.products.get(product_id)
+
+
+def test_search_matches_prefixes_and_typos():
+    async def scenario():
+        index = ProductSearchIndex(FakeDB([SHIRT, HAT]))
+        await index.build()
+        return index
+
+    index = asyncio.run(scenario())
+    assert [product["id"] for product in index.search("shir")] == ["a"]
+    assert [product["id"] for product in index.search("strew hat")] == ["b"]
+    assert index.search("linen hat") == []
+
+
+def test_startup_build_retries_until_it_succeeds(monkeypatch):
+    monkeypatch.setattr(search_index, "BUILD_RETRY_INITIAL", 0.001)
+
+    async def scenario():
+        db = FakeDB([SHIRT], failures=2)
+        index = ProductSearchIndex(db)
+        index.start()
+        while not index.ready:
+            await asyncio.sleep(0.001)
+        return index, db
+
+    index, db = asyncio.run(scenario())
+    assert db.builds == 3
+    assert [product["id"] for product in index.search("shirt")] == ["a"]
+
+
+def test_refresh_during_a_build_is_not_overwritten():
+    async def scenario():
+        db = FakeDB([SHIRT])
+        db.listing = asyncio.Event()
+        index = ProductSearchIndex(db)
+        building = asyncio.ensure_future(index.build())
+        await asyncio.sleep(0)
+
+        # A product is added while the build holds an older catalog snapshot
+        db.products["b"] = HAT
+        refreshing = asyncio.ensure_future(index.refresh("b"))
+        await asyncio.sleep(0)
+        db.listing.set()
+        await asyncio.gather(building, refreshing)
+        return index
+
+    index = asyncio.run(scenario())
+    assert [product["id"] for product in index.search("hat")] == ["b"]
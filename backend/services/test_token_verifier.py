@@ -0,0 +1,56 @@
+# backend/services/test_token_verifier.py
+# ============================================================================
+
+import asyncio
+import time
+import pytest
+from jose import JWTError, jwt
+from services.token_verifier import TokenVerifier
+from utils.config import settings
+
+SECRET = "test-signing-secret"
+
+
+@pytest.fixture
+def verifier(monkeypatch) -> TokenVerifier:
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", SECRET)
+    return TokenVerifier()
+
+
+def token(verifier: TokenVerifier, secret: str = SECRET, **claims) -> str:
+    payload = {
+        "sub": "user",
+        "aud": settings.JWT_AUDIENCE,
+        "iss": verifier.issuer,
+        "exp": int(time.time()) + 60,
+        **claims
+    }
+    return jwt.encode({key: value for key, value in payload.items() if value is not None}, secret, algorithm="HS256")
+
+
+def test_valid_token_is_accepted(verifier):
+    claims = asyncio.run(verifier.verify(token(verifier)))
+    assert claims["sub"] == "user"
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": None},
+    {"iss": None},
+    {"exp": None},
+    {"aud": "other"},
+    {"iss": "https://elsewhere.example/auth/v1"},
+    {"exp": int(time.time()) - 60},
+])
+def test_tokens_missing_or_with_wrong_claims_are_rejected(verifier, claims):
+    with pytest.raises(JWTError):
+        asyncio.run(verifier.verify(token(verifier, **claims)))
+
+
+def test_wrong_signature_is_rejected(verifier):
+    with pytest.raises(JWTError):
+        asyncio.run(verifier.verify(token(verifier, secret="app-secret")))
+
+
+def test_without_a_signing_secret_hs256_is_left_to_supabase(monkeypatch, verifier):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", None)
+    assert asyncio.run(TokenVerifier().verify(token(verifier))) is None
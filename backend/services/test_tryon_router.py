@@ -0,0 +1,70 @@
+# backend/services/test_tryon_router.py
+# ============================================================================
+
+import asyncio
+import time
+import pytest
+from services.tryon_router import TryOnRouter
+from utils.circuit_breaker import HALF_OPEN
+
+
+class SlowBackend:
+    name = "slow"
+    label = "Slow"
+    configured = True
+
+    def __init__(self):
+        self.started = False
+
+    async def generate(self, request) -> bytes:
+        self.started = True
+        await asyncio.sleep(60)
+        return b"image"
+
+
+def half_open_router(backend) -> TryOnRouter:
+    router = TryOnRouter([backend])
+    breaker = router.health[backend.name].breaker
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+    assert breaker.state == HALF_OPEN
+    return router
+
+
+def test_trial_is_released_when_cancelled_before_starting():
+    backend = SlowBackend()
+    router = half_open_router(backend)
+
+    async def scenario():
+        generating = asyncio.ensure_future(router.generate(None))
+        known = {asyncio.current_task(), generating}
+
+        def cancel_calls():
+            # Runs after generate() launched the call but before the call's first step
+            for task in asyncio.all_tasks() - known:
+                task.cancel()
+
+        asyncio.get_running_loop().call_soon(cancel_calls)
+        with pytest.raises(asyncio.CancelledError):
+            await generating
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert not backend.started
+    assert router.health["slow"].breaker.available()
+
+
+def test_trial_is_released_when_cancelled_while_running():
+    backend = SlowBackend()
+    router = half_open_router(backend)
+
+    async def scenario():
+        generating = asyncio.ensure_future(router.generate(None))
+        await asyncio.sleep(0.01)
+        generating.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await generating
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert backend.started
+    assert router.health["slow"].breaker.available()
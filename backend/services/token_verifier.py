@@ -0,0 +1,98 @@
+# backend/services/token_verifier.py
+# ============================================================================
+
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+from jose import JWTError, jwt
+
+from utils.config import settings
+
+ALLOWED_ALGORITHMS = {"HS256", "RS256", "ES256"}
+# Minimum gap between JWKS refreshes triggered by unknown key ids
+JWKS_MIN_REFRESH_INTERVAL = 30
+
+
+class TokenVerifier:
+    """
+    Verify Supabase access tokens without a round trip to Supabase Auth
+
+    HS256 tokens are checked against SUPABASE_JWT_SECRET, asymmetric tokens
+    against the project's JWKS, which is cached and refreshed when an
+    unknown key id shows up. JWT_SECRET is an app secret and is never used
+    to verify Supabase tokens.
+    """
+
+    def __init__(self):
+        self.secret = settings.SUPABASE_JWT_SECRET or None
+        self.issuer = f"{settings.SUPABASE_URL}/auth/v1"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+        self._keys = {}
+        self._keys_expire_at = 0.0
+        self._next_refresh_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> Optional[dict]:
+        """
+        Return the verified claims of a token
+
+        Returns None when the token cannot be checked locally (no secret
+        configured or unknown key id). Raises JWTError for tokens with a
+        bad signature, a missing or wrong audience or issuer, or that have
+        expired.
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm not in ALLOWED_ALGORITHMS:
+            raise JWTError(f"Unsupported token algorithm: {algorithm}")
+
+        if algorithm.startswith("HS"):
+            key = self.secret
+        else:
+            key = await self._get_signing_key(header.get("kid"))
+
+        if key is None:
+            return None
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.JWT_AUDIENCE,
+            issuer=self.issuer,
+            options={"require_aud": True, "require_iss": True, "require_exp": True}
+        )
+
+    async def _get_signing_key(self, kid: Optional[str]) -> Optional[dict]:
+        """Look up a JWK by key id, refreshing the key set when needed"""
+        if not kid:
+            return None
+
+        if kid in self._keys and time.monotonic() < self._keys_expire_at:
+            return self._keys[kid]
+
+        async with self._lock:
+            now = time.monotonic()
+            missing = kid not in self._keys or now >= self._keys_expire_at
+            if missing and now >= self._next_refresh_at:
+                await self._refresh_keys()
+
+        return self._keys.get(kid)
+
+    async def _refresh_keys(self):
+        """Download the JWKS; on failure keep serving the previous key set"""
+        self._next_refresh_at = time.monotonic() + JWKS_MIN_REFRESH_INTERVAL
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+            self._keys = {
+                key["kid"]: key
+                for key in response.json().get("keys", [])
+                if "kid" in key
+            }
+            self._keys_expire_at = time.monotonic() + settings.JWKS_CACHE_TTL
+        except Exception as e:
+            print(f"[AUTH] JWKS refresh failed: {str(e)}")
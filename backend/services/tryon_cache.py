@@ -0,0 +1,80 @@
+# backend/services/tryon_cache.py
+# ============================================================================
+
+import hashlib
+from typing import Awaitable, Callable
+from fastapi import Request
+from services.database import DatabaseService
+from utils.cache import ReadThroughCache, TTLCache
+from utils.config import settings
+from utils.metrics import metrics
+
+
+class TryOnResultCache:
+    """
+    Content-addressed cache of generated try-ons
+
+    A result is identified by the user, the hash of their photo, the
+    product (and its garment image) and the model that produced it, so
+    retrying the same try-on returns the stored images without another
+    upload or model call. Results are never shared between users, whose
+    photos live under their own storage paths.
+    Recent results live in an LRU; with TRYON_RESULT_INDEX_ENABLED they are
+    also recorded in the tryon_results table and survive restarts.
+    """
+
+    def __init__(self, db: DatabaseService, store=None):
+        self.db = db
+        self._store = store if store is not None else TTLCache(
+            maxsize=settings.TRYON_CACHE_SIZE,
+            ttl=settings.TRYON_CACHE_TTL
+        )
+        self._cache = ReadThroughCache("tryon_cache", self._store, ttl=settings.TRYON_CACHE_TTL)
+        metrics.register_gauge("tryon_cache", lambda: {"size": len(self._store)})
+
+    @staticmethod
+    def key(user_id: str, image: bytes, product: dict, model: str) -> str:
+        """Cache key for a user/photo/product/model combination"""
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(image).digest())
+        for part in (user_id, product["id"], product.get("image_url") or "", model):
+            digest.update(b"\0" + part.encode())
+        return digest.hexdigest()
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[dict]], model: str = None) -> dict:
+        """
+        Return the stored result for key, calling generate() on a miss
+
+        generate() must return the tryon_results row for the new result.
+        Concurrent requests for the same key share one generation. When a
+        row's model differs from the model in the key (a fallback backend
+        answered), it is kept only for TRYON_FALLBACK_CACHE_TTL and not
+        indexed, so the preferred model gets another chance soon.
+        """
+
+        def is_fallback(row: dict) -> bool:
+            return model is not None and row.get("model") != model
+
+        async def load():
+            if settings.TRYON_RESULT_INDEX_ENABLED:
+                row = await self.db.get_tryon_result(key)
+                if row:
+                    metrics.increment("tryon_cache.index_hits")
+                    return row
+
+            row = await generate()
+            if settings.TRYON_RESULT_INDEX_ENABLED and not is_fallback(row):
+                try:
+                    await self.db.save_tryon_result(row)
+                except Exception as e:
+                    print(f"[TRY-ON] Failed to index result: {str(e)}")
+            return row
+
+        return await self._cache.get_or_load(
+            key, load, lambda row: settings.TRYON_FALLBACK_CACHE_TTL if is_fallback(row) else None
+        )
+
+
+def get_tryon_cache(request: Request) -> TryOnResultCache:
+    """FastAPI dependency returning the app-scoped TryOnResultCache"""
+    return request.app.state.tryon_cache
@@ -0,0 +1,335 @@
+# backend/services/tryon_router.py
+# ============================================================================
+
+import asyncio
+import base64
+import time
+from collections import deque
+from typing import Optional
+from fastapi import Request
+from services.huggingface_service import HuggingFaceService
+from services.improved_tryon_service import VITON_API_URL, ImprovedTryOnService
+from services.model_monitor import ModelReadinessMonitor
+from utils.circuit_breaker import HALF_OPEN, CircuitBreaker
+from utils.config import settings
+from utils.image_processor import ProcessedImage
+from utils.metrics import metrics
+
+# Health score below which a backend is tried after the healthy ones
+DEGRADED_SCORE = 0.5
+# Weight of the newest call in the moving averages
+EWMA_ALPHA = 0.2
+# Successful latencies kept per backend for the p95
+LATENCY_WINDOW = 100
+
+
+class NoBackendAvailableError(Exception):
+    """Every backend in the chain failed or is switched off by its breaker"""
+
+
+class TryOnRequest:
+    """Inputs every backend may draw from"""
+
+    def __init__(self, photo: ProcessedImage, photo_url: str, product: dict):
+        self.photo = photo
+        self.photo_url = photo_url
+        self.product = product
+
+
+class VitonBackend:
+    """IDM-VTON on the Hugging Face Inference API"""
+    name = "viton"
+    label = "IDM-VTON"
+    model_url = VITON_API_URL
+    # Any request loads the model; once up it rejects this one cheaply
+    warm_payload = {"inputs": {}}
+
+    def __init__(self, service: ImprovedTryOnService, hf: HuggingFaceService):
+        self.service = service
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.service.hf_api_key)
+
+    async def generate(self, request: TryOnRequest) -> bytes:
+        garment = await self.service.garments.get(request.product["image_url"], request.product["id"])
+        return await self.service.viton(request.photo.data, garment)
+
+
+class ReplicateBackend:
+    """OOTDiffusion on Replicate"""
+    name = "replicate"
+    label = "Replicate OOTDiffusion"
+
+    def __init__(self, service: ImprovedTryOnService, hf: HuggingFaceService):
+        self.service = service
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.service.replicate_api_key)
+
+    async def generate(self, request: TryOnRequest) -> bytes:
+        output = await self.service.generate_with_replicate(request.photo_url, request.product["image_url"])
+        if isinstance(output, list):
+            output = output[0] if output else None
+        if not output:
+            raise Exception("Replicate returned no image")
+        return await self.service.fetch_image(str(output))
+
+
+class StableDiffusionBackend:
+    """Prompt-only Stable Diffusion; ignores the photo, so best kept late in the chain"""
+    name = "stable_diffusion"
+    label = "Stable Diffusion"
+    warm_payload = {"inputs": "warm-up", "parameters": {"num_inference_steps": 1}}
+
+    def __init__(self, service: ImprovedTryOnService, hf: HuggingFaceService):
+        self.hf = hf
+        self.model_url = hf.api_url
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.hf.api_key)
+
+    async def generate(self, request: TryOnRequest) -> bytes:
+        image = await self.hf.generate_tryon_image(
+            None, request.product["name"], request.product["image_url"]
+        )
+        return base64.b64decode(image)
+
+
+class OverlayBackend:
+    """Local garment overlay preview"""
+    name = "overlay"
+    label = "Overlay"
+    configured = True
+
+    def __init__(self, service: ImprovedTryOnService, hf: HuggingFaceService):
+        self.service = service
+
+    async def generate(self, request: TryOnRequest) -> bytes:
+        garment = await self.service.garments.get(request.product["image_url"], request.product["id"])
+        return await self.service.simple_overlay(request.photo.data, garment)
+
+
+class DemoBackend:
+    """Echoes the user's photo; the last resort that cannot fail"""
+    name = "demo"
+    label = "Demo"
+    configured = True
+
+    def __init__(self, service: ImprovedTryOnService, hf: HuggingFaceService):
+        pass
+
+    async def generate(self, request: TryOnRequest) -> bytes:
+        return request.photo.data
+
+
+# Names usable in TRYON_BACKENDS
+BACKENDS = {
+    backend.name: backend
+    for backend in (VitonBackend, ReplicateBackend, StableDiffusionBackend, OverlayBackend, DemoBackend)
+}
+
+
+class BackendHealth:
+    """Circuit breaker plus latency and success-rate tracking for one backend"""
+
+    def __init__(self, breaker: CircuitBreaker, slow_threshold: float):
+        self.breaker = breaker
+        self.slow_threshold = slow_threshold
+        self.calls = 0
+        self.success_rate = 1.0
+        self.latency = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, ok: bool, seconds: float):
+        """Record a finished call; failures count their time towards latency too"""
+        self.calls += 1
+        self.success_rate += EWMA_ALPHA * ((1.0 if ok else 0.0) - self.success_rate)
+        self.latency = seconds if self.calls == 1 else self.latency + EWMA_ALPHA * (seconds - self.latency)
+        if ok:
+            self.latencies.append(seconds)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    @property
+    def score(self) -> float:
+        """1.0 for a reliable backend under the slow threshold, lower otherwise"""
+        speed = min(1.0, self.slow_threshold / self.latency) if self.latency else 1.0
+        return self.success_rate * speed
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < settings.TRYON_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def to_dict(self) -> dict:
+        p95 = self.p95()
+        return {
+            "state": self.breaker.state,
+            "score": round(self.score, 3),
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3),
+            "p95": round(p95, 3) if p95 is not None else None
+        }
+
+
+def release_trial_if_cancelled(breaker: CircuitBreaker):
+    """Done callback giving back a half-open trial when its call was cancelled"""
+    def done(task: asyncio.Task):
+        if task.cancelled():
+            breaker.release()
+    return done
+
+
+class TryOnRouter:
+    """
+    Runs a try-on on the first backend in an ordered chain that answers
+
+    Each backend has a circuit breaker, so one that keeps failing (or
+    timing out) is skipped until its reset timeout passes instead of
+    costing every request its full timeout. Backends whose health score
+    (success rate, scaled down once latency passes the slow threshold)
+    drops below DEGRADED_SCORE, or whose hosted model the readiness
+    monitor reports as loading or down, are tried after the healthy
+    ones. With
+    hedging on, a backend that has not answered by its own p95 latency
+    gets the next backend started alongside it, and whichever succeeds
+    first wins.
+    """
+
+    def __init__(self, backends: list, hedge: bool = False, readiness: Optional[ModelReadinessMonitor] = None):
+        self.backends = backends
+        self.hedge = hedge
+        self.readiness = readiness
+        self.health = {
+            backend.name: BackendHealth(
+                CircuitBreaker(settings.TRYON_BREAKER_FAILURES, settings.TRYON_BREAKER_RESET),
+                settings.TRYON_SLOW_THRESHOLD
+            )
+            for backend in backends
+        }
+        metrics.register_gauge("tryon_router", lambda: {
+            name: health.to_dict() for name, health in self.health.items()
+        })
+
+    @property
+    def primary(self) -> str:
+        """Preferred backend, which identifies the generator in result cache keys"""
+        return self.backends[0].name if self.backends else "none"
+
+    def label(self, name: str) -> str:
+        backend = BACKENDS.get(name)
+        return backend.label if backend else name
+
+    def hosted_models(self) -> dict:
+        """Name -> (inference URL, warm-up payload) of backends with a hosted model"""
+        return {
+            backend.name: (backend.model_url, backend.warm_payload)
+            for backend in self.backends if getattr(backend, "model_url", None)
+        }
+
+    def degraded(self, backend) -> bool:
+        if self.readiness is not None and not self.readiness.is_ready(backend.name):
+            return True
+        return self.health[backend.name].score < DEGRADED_SCORE
+
+    def candidates(self) -> list:
+        """Backends worth trying now: healthy ones first, each group in chain order"""
+        ready = [backend for backend in self.backends if self.health[backend.name].breaker.available()]
+        return sorted(ready, key=self.degraded)
+
+    async def generate(self, request: TryOnRequest) -> tuple:
+        """Return (backend name, image bytes) from the first backend to succeed"""
+        candidates = iter(self.candidates())
+        pending = {}
+        errors = []
+
+        def launch() -> bool:
+            for backend in candidates:
+                breaker = self.health[backend.name].breaker
+                trial = breaker.state == HALF_OPEN
+                # Another request may have claimed a half-open breaker's trial meanwhile
+                if breaker.allow():
+                    task = asyncio.create_task(self._call(backend, request))
+                    if trial:
+                        # A cancelled call (lost a hedge race, client gone) gives no
+                        # verdict, even if it was cancelled before it started running
+                        task.add_done_callback(release_trial_if_cancelled(breaker))
+                    pending[task] = backend
+                    return True
+                errors.append(f"{backend.name}: circuit open")
+            return False
+
+        launch()
+        hedging = self.hedge
+        try:
+            while pending:
+                hedge_after = None
+                if hedging and len(pending) == 1:
+                    hedge_after = self.health[next(iter(pending.values())).name].p95()
+
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        metrics.increment("tryon_router.hedged")
+                    else:
+                        # Nothing left to hedge with; just wait for the running call
+                        hedging = False
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        image = task.result()
+                    except Exception as e:
+                        errors.append(f"{backend.name}: {str(e) or type(e).__name__}")
+                        continue
+                    metrics.increment(f"tryon_router.{backend.name}.served")
+                    return backend.name, image
+
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        metrics.increment("tryon_router.exhausted")
+        raise NoBackendAvailableError("No try-on backend succeeded: " + "; ".join(errors or ["none configured"]))
+
+    async def _call(self, backend, request: TryOnRequest) -> bytes:
+        health = self.health[backend.name]
+        started = time.perf_counter()
+        try:
+            image = await asyncio.wait_for(backend.generate(request), settings.TRYON_BACKEND_TIMEOUT)
+        except Exception as e:
+            health.record(False, time.perf_counter() - started)
+            metrics.increment(f"tryon_router.{backend.name}.failures")
+            print(f"[TRY-ON] Backend {backend.name} failed: {str(e) or type(e).__name__}")
+            raise
+        duration = time.perf_counter() - started
+        health.record(True, duration)
+        metrics.observe(f"tryon_router.{backend.name}", duration)
+        return image
+
+
+def create_tryon_router(service: ImprovedTryOnService, hf: HuggingFaceService) -> TryOnRouter:
+    """Router over the configured TRYON_BACKENDS that have credentials"""
+    backends = []
+    for name in settings.TRYON_BACKENDS:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown try-on backend: {name}")
+        backend = BACKENDS[name](service, hf)
+        if backend.configured:
+            backends.append(backend)
+        else:
+            print(f"[TRY-ON] Backend {name} is not configured, skipping")
+    return TryOnRouter(backends, hedge=settings.TRYON_HEDGE_ENABLED)
+
+
+def get_tryon_router(request: Request) -> TryOnRouter:
+    """FastAPI dependency returning the app-scoped TryOnRouter"""
+    return request.app.state.tryon_router
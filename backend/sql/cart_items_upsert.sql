@@ -0,0 +1,163 @@
+-- backend/sql/cart_items_upsert.sql
+-- ============================================================================
+-- Single-statement cart writes with the stock check done in the database.
+-- Called by DatabaseService.add_to_cart_item and set_cart_item_quantity
+-- when CART_RPC_ENABLED=true. Both return
+--   {"status": "ok", "item": {...cart_items row}}
+--   {"status": "not_found"}
+--   {"status": "insufficient_stock", "available": n, "in_cart": n}
+-- (in_cart, the quantity already in the cart, only from add_to_cart_item)
+-- apply_cart_operations runs a whole POST /cart/bulk request through them.
+
+-- Merge duplicate rows left behind by the old read-then-write add path,
+-- so a product appears at most once per cart
+with duplicates as (
+    select user_id, product_id, sum(quantity) as total, max(id::text) as keep
+    from cart_items
+    group by user_id, product_id
+    having count(*) > 1
+)
+update cart_items c
+set quantity = d.total
+from duplicates d
+where c.id::text = d.keep;
+
+delete from cart_items c
+using cart_items other
+where c.user_id = other.user_id
+  and c.product_id = other.product_id
+  and c.id::text < other.id::text;
+
+create unique index if not exists cart_items_user_product_key
+    on cart_items (user_id, product_id);
+
+-- Add p_quantity to the user's row for the product, creating it if needed.
+-- The conflict update locks the row, so concurrent adds are applied one
+-- after the other and each is checked against the current stock.
+create or replace function add_to_cart_item(p_user_id uuid, p_product_id uuid, p_quantity integer)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    item cart_items;
+    available integer;
+begin
+    insert into cart_items as c (user_id, product_id, quantity, created_at, updated_at)
+    select p_user_id, p.id, p_quantity, now(), now()
+    from products p
+    where p.id = p_product_id and p.stock_quantity >= p_quantity
+    on conflict (user_id, product_id) do update
+        set quantity = c.quantity + excluded.quantity,
+            updated_at = excluded.updated_at
+        where c.quantity + excluded.quantity <= (
+            select stock_quantity from products where id = p_product_id
+        )
+    returning c.* into item;
+
+    if found then
+        return jsonb_build_object('status', 'ok', 'item', to_jsonb(item));
+    end if;
+
+    select stock_quantity into available from products where id = p_product_id;
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+
+    return jsonb_build_object(
+        'status', 'insufficient_stock',
+        'available', available,
+        'in_cart', coalesce((
+            select quantity from cart_items
+            where user_id = p_user_id and product_id = p_product_id
+        ), 0)
+    );
+end;
+$$;
+
+-- Set the quantity of one of the user's cart rows, within stock
+create or replace function set_cart_item_quantity(p_user_id uuid, p_item_id uuid, p_quantity integer)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    item cart_items;
+    available integer;
+begin
+    update cart_items c
+    set quantity = p_quantity, updated_at = now()
+    from products p
+    where c.id = p_item_id
+      and c.user_id = p_user_id
+      and p.id = c.product_id
+      and p.stock_quantity >= p_quantity
+    returning c.* into item;
+
+    if found then
+        return jsonb_build_object('status', 'ok', 'item', to_jsonb(item));
+    end if;
+
+    select p.stock_quantity into available
+    from cart_items c join products p on p.id = c.product_id
+    where c.id = p_item_id and c.user_id = p_user_id;
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+
+    return jsonb_build_object('status', 'insufficient_stock', 'available', available);
+end;
+$$;
+
+-- Apply a list of {"op", "product_id", "item_id", "quantity"} operations in
+-- order, in one transaction. update and remove target the row for
+-- product_id, or item_id when no product_id is given. Returns one result
+-- per operation: the shapes above, plus {"status": "removed", "item": {...}}.
+create or replace function apply_cart_operations(p_user_id uuid, p_operations jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    operation jsonb;
+    target cart_items;
+    result jsonb;
+    results jsonb := '[]'::jsonb;
+begin
+    for operation in select value from jsonb_array_elements(p_operations) loop
+        if operation->>'op' = 'add' then
+            result := add_to_cart_item(
+                p_user_id, (operation->>'product_id')::uuid, (operation->>'quantity')::integer
+            );
+        else
+            select * into target from cart_items c
+            where c.user_id = p_user_id
+              and case
+                  when operation->>'product_id' is not null then c.product_id = (operation->>'product_id')::uuid
+                  else c.id = (operation->>'item_id')::uuid
+              end;
+
+            if not found then
+                result := jsonb_build_object('status', 'not_found');
+            elsif operation->>'op' = 'remove' then
+                delete from cart_items where id = target.id;
+                result := jsonb_build_object('status', 'removed', 'item', to_jsonb(target));
+            else
+                result := set_cart_item_quantity(p_user_id, target.id, (operation->>'quantity')::integer);
+            end if;
+        end if;
+
+        results := results || jsonb_build_array(result);
+    end loop;
+
+    return results;
+end;
+$$;
+
+-- Only the backend (service role) may act on arbitrary users' carts
+revoke execute on function add_to_cart_item(uuid, uuid, integer) from public, anon, authenticated;
+revoke execute on function set_cart_item_quantity(uuid, uuid, integer) from public, anon, authenticated;
+revoke execute on function apply_cart_operations(uuid, jsonb) from public, anon, authenticated;
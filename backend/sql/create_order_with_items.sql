@@ -0,0 +1,38 @@
+-- backend/sql/create_order_with_items.sql
+-- ============================================================================
+-- Creates an order, all of its line items and clears the user's cart in a
+-- single transaction. Called by DatabaseService.create_order_with_items when
+-- ORDER_RPC_ENABLED=true.
+
+create or replace function create_order_with_items(p_order jsonb, p_items jsonb)
+returns setof orders
+language plpgsql
+security definer
+set search_path = public, pg_temp
+as $$
+declare
+    new_order orders;
+begin
+    insert into orders (
+        id, user_id, total_amount, payment_method,
+        shipping_address, order_status, created_at
+    )
+    select
+        o.id, o.user_id, o.total_amount, o.payment_method,
+        o.shipping_address, o.order_status, o.created_at
+    from jsonb_populate_record(null::orders, p_order) as o
+    returning * into new_order;
+
+    insert into order_items (order_id, product_id, quantity, price)
+    select new_order.id, i.product_id, i.quantity, i.price
+    from jsonb_populate_recordset(null::order_items, p_items) as i;
+
+    delete from cart_items where user_id = new_order.user_id;
+
+    return next new_order;
+end;
+$$;
+
+-- Only the backend (service role) may place orders on behalf of users
+revoke execute on function create_order_with_items(jsonb, jsonb) from public, anon, authenticated;
+grant execute on function create_order_with_items(jsonb, jsonb) to service_role;
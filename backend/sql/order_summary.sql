@@ -0,0 +1,47 @@
+-- backend/sql/order_summary.sql
+-- ============================================================================
+-- Precomputed list-view fields on orders: the number of items and a
+-- thumbnail of the first line item. Kept up to date by a trigger on
+-- order_items, so both order creation paths (RPC and bulk insert) fill
+-- them in. Read by GET /orders/ when ORDER_SUMMARY_ENABLED=true. Apply
+-- sql/product_image_variants.sql first.
+
+alter table orders add column if not exists item_count integer not null default 0;
+alter table orders add column if not exists thumbnail_url text;
+
+create or replace function order_items_update_summary()
+returns trigger
+language plpgsql
+as $$
+begin
+    update orders o
+    set item_count = o.item_count + new.quantity,
+        thumbnail_url = coalesce(o.thumbnail_url, (
+            select coalesce(p.image_variants->'thumbnail'->>'jpeg', p.image_url)
+            from products p
+            where p.id = new.product_id
+        ))
+    where o.id = new.order_id;
+    return new;
+end;
+$$;
+
+drop trigger if exists order_items_update_summary on order_items;
+create trigger order_items_update_summary
+    after insert on order_items
+    for each row execute function order_items_update_summary();
+
+-- Backfill existing orders
+update orders o
+set item_count = s.item_count,
+    thumbnail_url = s.thumbnail_url
+from (
+    select
+        i.order_id,
+        sum(i.quantity) as item_count,
+        (array_agg(coalesce(p.image_variants->'thumbnail'->>'jpeg', p.image_url) order by i.id))[1] as thumbnail_url
+    from order_items i
+    left join products p on p.id = i.product_id
+    group by i.order_id
+) s
+where o.id = s.order_id;
@@ -0,0 +1,8 @@
+-- backend/sql/product_image_variants.sql
+-- ============================================================================
+-- URLs of the resized derivatives of each product image, written by
+-- `python -m scripts.backfill_image_variants`. Shape:
+-- {"source": "<image_url>", "thumbnail": {"jpeg": "...", "webp": "..."},
+--  "card": {...}, "detail": {...}}
+
+alter table products add column if not exists image_variants jsonb;
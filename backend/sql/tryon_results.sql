@@ -0,0 +1,23 @@
+-- backend/sql/tryon_results.sql
+-- ============================================================================
+-- Persistent index of generated try-ons, keyed by the user, the content
+-- hash of their photo, the product and the model. Lets TryOnResultCache
+-- hits survive restarts and be shared between instances. Used when
+-- TRYON_RESULT_INDEX_ENABLED=true.
+
+create table if not exists tryon_results (
+    cache_key text primary key,
+    product_id uuid not null references products(id) on delete cascade,
+    model text not null,
+    user_id uuid not null,
+    history_id uuid,
+    original_image_url text not null,
+    generated_image_url text not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists tryon_results_product_id_idx on tryon_results (product_id);
+
+-- Rows name users and their photos: no policies, so only the backend
+-- (service role, which bypasses RLS) can read or write them
+alter table tryon_results enable row level security;
@@ -0,0 +1,155 @@
+# backend/utils/cache.py
+# ============================================================================
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Union
+from utils.metrics import metrics
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a live entry and mark it as recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """Store an entry, evicting the least recently used ones when full"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
+
+
+class ReadThroughCache:
+    """
+    Read-through cache with single-flight loading
+
+    Concurrent misses on the same key share one loader call instead of
+    stampeding the backend. The store can be any object with TTLCache's
+    get/set/pop/clear methods, e.g. a client for a shared cache.
+    """
+
+    def __init__(self, name: str, store=None, ttl: float = 60.0):
+        self.name = name
+        self.store = store if store is not None else TTLCache(ttl=ttl)
+        self.ttl = ttl
+        self._inflight = {}
+        # Bumped on invalidation so loads started before it aren't stored
+        self._generation = 0
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable], ttl: Union[float, Callable] = None):
+        """
+        Return the cached value for key, calling loader() once on a miss
+
+        ttl may be a function of the loaded value, for values that should
+        be kept for less time than others.
+        """
+        value = self.store.get(key, _MISSING)
+        if value is not _MISSING:
+            metrics.increment(f"{self.name}.hits")
+            return value
+
+        metrics.increment(f"{self.name}.misses")
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.increment(f"{self.name}.coalesced")
+            return await asyncio.shield(task)
+
+        generation = self._generation
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+        if callable(ttl):
+            ttl = ttl(value)
+        if generation == self._generation:
+            self.store.set(key, value, self.ttl if ttl is None else ttl)
+        return value
+
+    def update(self, key, update: Callable, ttl: float = None) -> bool:
+        """
+        Write-through: replace the cached value for key with update(value)
+
+        Returns False when nothing was cached, or when a load for key is in
+        flight; that load may predate the write, so it is discarded and
+        key left empty. update may return None to drop key.
+        """
+        if key in self._inflight:
+            self.invalidate(key)
+            return False
+
+        value = self.store.get(key, _MISSING)
+        if value is _MISSING:
+            return False
+
+        value = update(value)
+        if value is None:
+            self.store.pop(key)
+        else:
+            self.store.set(key, value, self.ttl if ttl is None else ttl)
+        return True
+
+    def set(self, key, value, ttl: float = None):
+        """Store a value known to be current, discarding any load in flight for key"""
+        if key in self._inflight:
+            self._generation += 1
+        self.store.set(key, value, self.ttl if ttl is None else ttl)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given"""
+        self._generation += 1
+        if key is None:
+            self.store.clear()
+        else:
+            self.store.pop(key)
@@ -0,0 +1,158 @@
+# backend/utils/compositor.py
+# ============================================================================
+
+import threading
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Largest side of the grid the background flood fill runs on
+FILL_GRID = 128
+
+
+def _flood_from_border(candidate: np.ndarray) -> np.ndarray:
+    """Pixels of candidate connected to the image border (4-connectivity)"""
+    filled = np.zeros_like(candidate)
+    filled[0], filled[-1] = candidate[0], candidate[-1]
+    filled[:, 0] |= candidate[:, 0]
+    filled[:, -1] |= candidate[:, -1]
+
+    grown = np.empty_like(filled)
+    while True:
+        np.copyto(grown, filled)
+        grown[1:] |= filled[:-1]
+        grown[:-1] |= filled[1:]
+        grown[:, 1:] |= filled[:, :-1]
+        grown[:, :-1] |= filled[:, 1:]
+        grown &= candidate
+        if np.array_equal(grown, filled):
+            return filled
+        filled, grown = grown, filled
+
+
+def background_mask(rgb: np.ndarray, tolerance: int = 30) -> np.ndarray:
+    """
+    Boolean mask of a product photo's plain backdrop
+
+    Pixels close to the median border colour are candidates; only those
+    connected to the border count, so light areas inside the garment are
+    kept. The fill runs on a coarse grid and is then refined against the
+    full-resolution candidates.
+    """
+    height, width = rgb.shape[:2]
+    border = np.concatenate((rgb[0], rgb[-1], rgb[:, 0], rgb[:, -1]))
+    backdrop = np.median(border, axis=0).astype(np.int16)
+    candidate = (np.abs(rgb.astype(np.int16) - backdrop).max(axis=2) <= tolerance)
+
+    step = max(1, -(-max(height, width) // FILL_GRID))
+    connected = _flood_from_border(candidate[::step, ::step])
+    # Grow by one cell so block edges along the garment outline are covered
+    grown = connected.copy()
+    grown[1:] |= connected[:-1]
+    grown[:-1] |= connected[1:]
+    grown[:, 1:] |= connected[:, :-1]
+    grown[:, :-1] |= connected[:, 1:]
+    full = np.repeat(np.repeat(grown, step, axis=0), step, axis=1)[:height, :width]
+    return candidate & full
+
+
+def cut_out_background(garment: Image.Image, tolerance: int = 30) -> Image.Image:
+    """
+    RGBA garment with its backdrop made transparent
+
+    Images that already carry transparency along the border are returned
+    as they are.
+    """
+    rgba = np.array(garment.convert("RGBA"))
+    alpha = rgba[..., 3]
+    if min(alpha[0].min(), alpha[-1].min(), alpha[:, 0].min(), alpha[:, -1].min()) < 255:
+        return garment
+
+    alpha[background_mask(rgba[..., :3], tolerance)] = 0
+    return Image.fromarray(rgba, "RGBA")
+
+
+def feather_edges(garment: Image.Image, radius: float = 2.0) -> Image.Image:
+    """Soften the garment outline by blurring its alpha channel"""
+    feathered = garment.copy()
+    feathered.putalpha(garment.getchannel("A").filter(ImageFilter.GaussianBlur(radius)))
+    return feathered
+
+
+class OverlayCompositor:
+    """
+    Array-backed alpha compositing for the try-on overlay preview
+
+    Only the garment's footprint is blended, in float32 scratch buffers
+    reused across calls (one set per worker thread). A composite copies
+    the full frame twice, into and out of the array, whatever the sizes.
+    Background removal and feathering can be done ahead of time (see
+    GarmentCache) and skipped here with prepared=True.
+    """
+
+    def __init__(self, width_ratio: float = 0.6, top_ratio: float = 0.25, feather: float = 2.0,
+                 remove_background: bool = True, tolerance: int = 30):
+        self.width_ratio = width_ratio
+        self.top_ratio = top_ratio
+        self.feather = feather
+        self.remove_background = remove_background
+        self.tolerance = tolerance
+        self._local = threading.local()
+
+    def _scratch(self, height: int, width: int) -> tuple:
+        """Views of the thread's scratch buffers, grown when too small"""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None or buffers[0].shape[0] < height or buffers[0].shape[1] < width:
+            shape = (max(height, buffers[0].shape[0] if buffers else 0),
+                     max(width, buffers[0].shape[1] if buffers else 0))
+            buffers = (np.empty(shape + (3,), np.float32), np.empty(shape + (1,), np.float32))
+            self._local.buffers = buffers
+        pixels, alpha = buffers
+        return pixels[:height, :width], alpha[:height, :width]
+
+    def garment_width(self, person_width: int) -> int:
+        return max(int(person_width * self.width_ratio), 1)
+
+    def cut_out(self, garment: Image.Image) -> Image.Image:
+        """Garment with its backdrop removed, if remove_background is set"""
+        return cut_out_background(garment, self.tolerance) if self.remove_background else garment
+
+    def feathered(self, garment: Image.Image) -> Image.Image:
+        """Garment with softened edges, if feather is set"""
+        return feather_edges(garment, self.feather) if self.feather else garment
+
+    def prepare(self, garment: Image.Image) -> Image.Image:
+        """Both steps compose() needs on a raw garment"""
+        return self.feathered(self.cut_out(garment))
+
+    def compose(self, person: Image.Image, garment: Image.Image, prepared: bool = False) -> Image.Image:
+        """Blend garment (RGBA, already garment_width() wide) onto person"""
+        if not prepared:
+            garment = self.prepare(garment)
+
+        frame = np.array(person.convert("RGB"))
+        left = (person.width - garment.width) // 2
+        top = int(person.height * self.top_ratio)
+
+        # Clip the garment to the frame
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + garment.width, person.width), min(top + garment.height, person.height)
+        if x1 <= x0 or y1 <= y0:
+            return Image.fromarray(frame, "RGB")
+
+        layer = np.asarray(garment)[y0 - top:y1 - top, x0 - left:x1 - left]
+        target = frame[y0:y1, x0:x1]
+        pixels, alpha = self._scratch(y1 - y0, x1 - x0)
+
+        # target += alpha * (garment - target), rounded back to uint8
+        np.divide(layer[..., 3:], 255.0, out=alpha)
+        np.subtract(layer[..., :3], target, out=pixels, dtype=np.float32)
+        np.multiply(pixels, alpha, out=pixels)
+        np.add(pixels, target, out=pixels)
+        np.add(pixels, 0.5, out=pixels)
+        np.copyto(target, pixels, casting="unsafe")
+
+        return Image.fromarray(frame, "RGB")
+
+
+# Shared by the overlay preview and the garment cache that prepares its inputs
+OVERLAY = OverlayCompositor()
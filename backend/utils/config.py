@@ -12,6 +12,96 @@ class Settings:
     SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     HUGGING_FACE_API_KEY = os.getenv("HUGGING_FACE_API_KEY")
     JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
+    # Supabase project's JWT signing secret (Settings > API); without it HS256
+    # access tokens are verified remotely by Supabase Auth
+    SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+    JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+    # "local" verifies tokens in-process, "remote" always asks Supabase Auth
+    AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local")
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "300"))
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+    JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", "3600"))
+    # Shared Supabase HTTP pool
+    SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+    SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+    SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+    SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    # Requires sql/create_order_with_items.sql to be applied to the database
+    ORDER_RPC_ENABLED = os.getenv("ORDER_RPC_ENABLED", "false").lower() == "true"
+    # Requires sql/order_summary.sql; order lists then skip the line items entirely
+    ORDER_SUMMARY_ENABLED = os.getenv("ORDER_SUMMARY_ENABLED", "false").lower() == "true"
+    # Requires sql/cart_items_upsert.sql to be applied to the database
+    CART_RPC_ENABLED = os.getenv("CART_RPC_ENABLED", "false").lower() == "true"
+    PRICE_INDEX_TTL = int(os.getenv("PRICE_INDEX_TTL", "30"))
+    PRICE_INDEX_SIZE = int(os.getenv("PRICE_INDEX_SIZE", "5000"))
+    CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "2000"))
+    CATALOG_PRODUCT_TTL = int(os.getenv("CATALOG_PRODUCT_TTL", "300"))
+    CATALOG_LIST_TTL = int(os.getenv("CATALOG_LIST_TTL", "60"))
+    # Product ids that were not found; 0 disables negative caching
+    CATALOG_MISS_TTL = int(os.getenv("CATALOG_MISS_TTL", "5"))
+    # Per-user cart snapshots behind GET /cart and /cart/summary
+    CART_CACHE_SIZE = int(os.getenv("CART_CACHE_SIZE", "10000"))
+    CART_CACHE_TTL = int(os.getenv("CART_CACHE_TTL", "300"))
+    # Stored responses for Idempotency-Key retries of POST /orders and /cart/items
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    # Try-on model calls
+    TRYON_TIMEOUT = float(os.getenv("TRYON_TIMEOUT", "60"))
+    TRYON_CONNECT_TIMEOUT = float(os.getenv("TRYON_CONNECT_TIMEOUT", "5"))
+    TRYON_FETCH_TIMEOUT = float(os.getenv("TRYON_FETCH_TIMEOUT", "15"))
+    TRYON_MAX_RETRIES = int(os.getenv("TRYON_MAX_RETRIES", "2"))
+    # Largest accepted image upload, in bytes
+    MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(5 * 1024 * 1024)))
+    # Pool for CPU-bound image work: "thread" or "process"
+    IMAGE_EXECUTOR = os.getenv("IMAGE_EXECUTOR", "thread")
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 1)))
+    IMAGE_QUEUE_SIZE = int(os.getenv("IMAGE_QUEUE_SIZE", "32"))
+    IMAGE_TASK_TIMEOUT = float(os.getenv("IMAGE_TASK_TIMEOUT", "30"))
+    # Decoded garment images, per product image URL
+    GARMENT_WIDTHS = tuple(int(w) for w in os.getenv("GARMENT_WIDTHS", "256,512,768").split(","))
+    GARMENT_CACHE_SIZE = int(os.getenv("GARMENT_CACHE_SIZE", "64"))
+    GARMENT_CACHE_TTL = int(os.getenv("GARMENT_CACHE_TTL", "86400"))
+    GARMENT_WARM_ON_STARTUP = os.getenv("GARMENT_WARM_ON_STARTUP", "false").lower() == "true"
+    # Resized product image derivatives: "supabase" bucket or "local" directory
+    IMAGE_VARIANT_STORE = os.getenv("IMAGE_VARIANT_STORE", "supabase")
+    IMAGE_VARIANT_BUCKET = os.getenv("IMAGE_VARIANT_BUCKET", "product-images")
+    IMAGE_VARIANT_DIR = os.getenv("IMAGE_VARIANT_DIR", "media")
+    # Requires sql/product_image_variants.sql; cart rows and order thumbnails then use products.image_variants
+    IMAGE_VARIANTS_ENABLED = os.getenv("IMAGE_VARIANTS_ENABLED", "false").lower() == "true"
+    # User photos are normalised to fit within this many pixels
+    TRYON_PHOTO_MAX_SIZE = int(os.getenv("TRYON_PHOTO_MAX_SIZE", "1024"))
+    # Background try-on jobs
+    TRYON_WORKERS = int(os.getenv("TRYON_WORKERS", "4"))
+    TRYON_QUEUE_SIZE = int(os.getenv("TRYON_QUEUE_SIZE", "50"))
+    TRYON_MAX_JOBS_PER_USER = int(os.getenv("TRYON_MAX_JOBS_PER_USER", "3"))
+    TRYON_JOB_TIMEOUT = float(os.getenv("TRYON_JOB_TIMEOUT", "300"))
+    TRYON_JOB_TTL = int(os.getenv("TRYON_JOB_TTL", "3600"))
+    # Content-addressed try-on results; the index needs sql/tryon_results.sql
+    TRYON_CACHE_SIZE = int(os.getenv("TRYON_CACHE_SIZE", "5000"))
+    TRYON_CACHE_TTL = int(os.getenv("TRYON_CACHE_TTL", "86400"))
+    TRYON_RESULT_INDEX_ENABLED = os.getenv("TRYON_RESULT_INDEX_ENABLED", "false").lower() == "true"
+    # Try-on backends, tried in order: viton, replicate, stable_diffusion, overlay, demo
+    TRYON_BACKENDS = tuple(b.strip() for b in os.getenv("TRYON_BACKENDS", "viton,replicate,overlay,demo").split(","))
+    TRYON_BACKEND_TIMEOUT = float(os.getenv("TRYON_BACKEND_TIMEOUT", "120"))
+    TRYON_BREAKER_FAILURES = int(os.getenv("TRYON_BREAKER_FAILURES", "5"))
+    TRYON_BREAKER_RESET = float(os.getenv("TRYON_BREAKER_RESET", "30"))
+    # Backends averaging slower than this (seconds) lose health score
+    TRYON_SLOW_THRESHOLD = float(os.getenv("TRYON_SLOW_THRESHOLD", "20"))
+    TRYON_HEDGE_ENABLED = os.getenv("TRYON_HEDGE_ENABLED", "false").lower() == "true"
+    TRYON_HEDGE_MIN_SAMPLES = int(os.getenv("TRYON_HEDGE_MIN_SAMPLES", "20"))
+    # Results from a fallback backend are cached briefly so the preferred one gets retried
+    TRYON_FALLBACK_CACHE_TTL = int(os.getenv("TRYON_FALLBACK_CACHE_TTL", "300"))
+    # Background readiness checks of hosted try-on models; warm pings only
+    # go out during MODEL_WARM_HOURS ("start-end" in UTC, empty to disable)
+    MODEL_MONITOR_ENABLED = os.getenv("MODEL_MONITOR_ENABLED", "true").lower() == "true"
+    MODEL_PROBE_INTERVAL = float(os.getenv("MODEL_PROBE_INTERVAL", "60"))
+    MODEL_PROBE_TIMEOUT = float(os.getenv("MODEL_PROBE_TIMEOUT", "10"))
+    MODEL_WARM_INTERVAL = float(os.getenv("MODEL_WARM_INTERVAL", "300"))
+    MODEL_WARM_HOURS = os.getenv("MODEL_WARM_HOURS", "8-22")
+    # Remembered content-addressed uploads, to skip re-uploading known bytes
+    MEDIA_STORE_CACHE_SIZE = int(os.getenv("MEDIA_STORE_CACHE_SIZE", "20000"))
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
     BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -1,13 +1,28 @@
 # backend/utils/helpers.py
 # ============================================================================
 
+import base64
+import json
+import re
 import uuid
 from datetime import datetime
+from typing import Optional
+
+# Characters allowed in decoded cursor values (ISO timestamps and ids)
+CURSOR_VALUE_PATTERN = re.compile(r"[\w:.+\- ]+")
 
 def generate_id():
     """Generate unique ID"""
     return str(uuid.uuid4())
 
+def is_uuid(value: str) -> bool:
+    """Whether value is a UUID string, as database ids are"""
+    try:
+        uuid.UUID(value)
+        return True
+    except (ValueError, TypeError, AttributeError):
+        return False
+
 def get_timestamp():
     """Get current UTC timestamp"""
     return datetime.utcnow().isoformat()
@@ -22,6 +37,40 @@ def paginate(offset: int = 0, limit: int = 10) -> tuple:
     """Return pagination offset and limit"""
     return offset, limit
 
+def encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor pointing just after row, on (created_at, id)"""
+    raw = json.dumps([row["created_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Return (created_at, id) from a cursor; an empty cursor is the first page"""
+    if not cursor:
+        return None
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not all(CURSOR_VALUE_PATTERN.fullmatch(str(value)) for value in (created_at, row_id)):
+        raise ValueError("Invalid cursor")
+    return str(created_at), str(row_id)
+
+def cursor_page(rows: list, limit: int) -> dict:
+    """Build a page from up to limit + 1 rows fetched after a cursor"""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "data": rows,
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None
+    }
+
 def format_price(price: float) -> float:
     """Format price to 2 decimal places"""
     return round(price, 2)
+
+def effective_price(price: float, discount_price: Optional[float] = None) -> float:
+    """Unit price charged, using the discount price when it is a real discount"""
+    if discount_price is not None and 0 < discount_price < price:
+        return format_price(discount_price)
+    return format_price(price)
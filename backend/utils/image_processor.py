@@ -3,15 +3,107 @@
 
 import os
 from io import BytesIO
-from PIL import Image
+from PIL import Image, ImageOps
 import base64
 from datetime import datetime
+from typing import Optional
 import uuid
+from fastapi import UploadFile
+from utils.config import settings
+
+# Enough leading bytes to recognise every allowed format
+HEADER_SIZE = 16
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLargeError(ValueError):
+    """The upload is over ImageProcessor.MAX_SIZE"""
+
+
+class UnsupportedImageError(ValueError):
+    """The upload doesn't start like an image in an allowed format"""
+
+
+class ProcessedImage:
+    """Encoded output of an ImagePipeline, with the metadata later stages need"""
+
+    def __init__(self, data: bytes, format: str, width: int, height: int,
+                 source_format: Optional[str], source_width: int, source_height: int):
+        self.data = data
+        self.format = format
+        self.width = width
+        self.height = height
+        self.source_format = source_format
+        self.source_width = source_width
+        self.source_height = source_height
+
+    @property
+    def mime_type(self) -> str:
+        return ImageProcessor.MIME_TYPES[self.format]
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+
+class ImagePipeline:
+    """
+    Decode once, normalise, encode once
+
+    Applies EXIF orientation, shrinks to fit max_size and converts the mode
+    for the output format. JPEGs being shrunk are decoded straight at a
+    reduced scale (Image.draft), so large photos are never fully decoded.
+    """
+
+    def __init__(self, max_size: Optional[int] = 1024, format: str = 'JPEG', quality: int = 85,
+                 optimize: bool = True, min_size: int = 0):
+        self.max_size = max_size
+        self.format = format
+        self.quality = quality
+        self.optimize = optimize
+        self.min_size = min_size
+
+    def process(self, data: bytes) -> ProcessedImage:
+        img, source = self.decode(data)
+        return self.encode(img, source)
+
+    def decode(self, data: bytes) -> tuple:
+        """Open, orient and shrink; returns (image, (format, width, height)) of the source"""
+        try:
+            img = Image.open(BytesIO(data))
+            source = (img.format, img.width, img.height)
+        except Exception:
+            raise ValueError("File is not a readable image")
+
+        if min(img.size) < self.min_size:
+            raise ValueError(f"Image too small (min {self.min_size}x{self.min_size})")
+
+        if self.max_size and max(img.size) > self.max_size:
+            # Only does anything for JPEG; must happen before pixels load
+            img.draft(None, (self.max_size, self.max_size))
+
+        img = ImageOps.exif_transpose(img)
+
+        if self.max_size and max(img.size) > self.max_size:
+            img.thumbnail((self.max_size, self.max_size), Image.Resampling.LANCZOS)
+        return img, source
+
+    def encode(self, img: Image.Image, source: tuple) -> ProcessedImage:
+        """Convert the mode for the output format and encode"""
+        if self.format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        elif self.format != 'JPEG' and img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA')
+
+        output = BytesIO()
+        img.save(output, format=self.format, quality=self.quality, optimize=self.optimize)
+        return ProcessedImage(output.getvalue(), self.format, img.width, img.height, *source)
 
 
 class ImageProcessor:
-    MAX_SIZE = 5 * 1024 * 1024  # 5MB
-    ALLOWED_FORMATS = {'JPEG', 'PNG', 'JPG'}
+    MAX_SIZE = settings.MAX_UPLOAD_SIZE
+    ALLOWED_FORMATS = {'JPEG', 'PNG', 'JPG', 'WEBP'}
+    MIME_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp', 'AVIF': 'image/avif'}
 
     @staticmethod
     def validate_image(file_data: bytes) -> bool:
@@ -24,17 +116,73 @@ class ImageProcessor:
         except Exception:
             return False
 
+    @staticmethod
+    def sniff_format(header: bytes) -> Optional[str]:
+        """Identify the image format from its first bytes, without decoding"""
+        if header.startswith(b"\xff\xd8\xff"):
+            return 'JPEG'
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            return 'PNG'
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return 'WEBP'
+        return None
+
+    @staticmethod
+    async def read_upload(upload: UploadFile, max_size: int = None) -> tuple:
+        """
+        Read an uploaded image in chunks and return (bytes, format)
+
+        Rejects the upload from its header bytes if it isn't an allowed
+        image, and stops reading as soon as it grows past max_size, so at
+        most max_size bytes are ever buffered.
+        """
+        max_size = max_size or ImageProcessor.MAX_SIZE
+        buffer = bytearray(await upload.read(HEADER_SIZE))
+        image_format = ImageProcessor.sniff_format(bytes(buffer))
+        if image_format not in ImageProcessor.ALLOWED_FORMATS:
+            raise UnsupportedImageError("File must be a JPEG, PNG or WebP image")
+
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(buffer) + len(chunk) > max_size:
+                raise ImageTooLargeError(f"Image must be less than {max_size // (1024 * 1024)}MB")
+            buffer += chunk
+
+        return bytes(buffer), image_format
+
+    @staticmethod
+    def normalize(file_data: bytes, max_size: Optional[int] = 1024, quality: int = 85) -> ProcessedImage:
+        """Orient, resize and re-encode an image as JPEG in a single decode"""
+        return ImagePipeline(max_size=max_size, quality=quality).process(file_data)
+
+    @staticmethod
+    def render_variants(file_data: bytes, sizes: dict, formats: tuple = ('JPEG', 'WEBP'),
+                        quality: int = 85) -> dict:
+        """
+        Render every size in every format from a single decode
+
+        sizes maps a variant name to its max side; returns
+        {(name, format): ProcessedImage}. Smaller sizes are shrunk from the
+        previous, larger one rather than from the original.
+        """
+        img, source = ImagePipeline(max_size=max(sizes.values())).decode(file_data)
+        encoders = {fmt: ImagePipeline(max_size=None, format=fmt, quality=quality) for fmt in formats}
+
+        variants = {}
+        for name, max_size in sorted(sizes.items(), key=lambda item: -item[1]):
+            if max(img.size) > max_size:
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            for fmt, encoder in encoders.items():
+                variants[(name, fmt)] = encoder.encode(img, source)
+        return variants
+
     @staticmethod
     def compress_image(file_data: bytes, quality: int = 85) -> bytes:
         """Compress image to reduce size"""
         try:
-            img = Image.open(BytesIO(file_data))
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-
-            output = BytesIO()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            return output.getvalue()
+            return ImagePipeline(max_size=None, quality=quality).process(file_data).data
         except Exception as e:
             raise Exception(f"Image compression failed: {str(e)}")
 
@@ -51,20 +199,7 @@ class ImageProcessor:
     @staticmethod
     def optimize_for_upload(image_bytes: bytes, max_size: int = 1024) -> bytes:
         """Compress and resize image before upload"""
-        img = Image.open(BytesIO(image_bytes))
-
-        # Resize if needed
-        if img.width > max_size or img.height > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
-        # Convert RGBA to RGB
-        if img.mode == 'RGBA':
-            img = img.convert('RGB')
-
-        # Compress
-        output = BytesIO()
-        img.save(output, format='JPEG', quality=85, optimize=True)
-        return output.getvalue()
+        return ImagePipeline(max_size=max_size).process(image_bytes).data
 
     @staticmethod
     def convert_from_base64(base64_str: str) -> bytes:
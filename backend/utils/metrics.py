@@ -0,0 +1,50 @@
+# backend/utils/metrics.py
+# ============================================================================
+
+import threading
+from collections import defaultdict
+from typing import Callable
+
+
+class Metrics:
+    """Process-wide counters, timings and gauges served at /metrics"""
+
+    def __init__(self):
+        self._counters = defaultdict(int)
+        self._timings = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1):
+        """Add to a monotonically increasing counter"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration, keeping count, total and max"""
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def register_gauge(self, name: str, read: Callable[[], object]):
+        """Register a callable sampled every time metrics are read"""
+        self._gauges[name] = read
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: dict(timing) for name, timing in self._timings.items()}
+
+        gauges = {}
+        for name, read in list(self._gauges.items()):
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = f"error: {str(e)}"
+
+        return {"counters": counters, "timings": timings, "gauges": gauges}
+
+
+metrics = Metrics()
@@ -19,13 +19,16 @@ export default function Orders() {
   const { user } = useAuth()
   const [orders, setOrders] = useState<Order[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     if (!user) return
     const fetchOrders = async () => {
       try {
-        const response = await orderAPI.getAll()
-        setOrders(response.data)
+        const response = await orderAPI.getPage()
+        setOrders(response.data.data)
+        setNextCursor(response.data.next_cursor)
       } catch (error) {
         console.error('Failed to fetch orders:', error)
       } finally {
@@ -35,6 +38,20 @@ export default function Orders() {
     fetchOrders()
   }, [user])
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const response = await orderAPI.getPage(nextCursor)
+      setOrders((current) => [...current, ...response.data.data])
+      setNextCursor(response.data.next_cursor)
+    } catch (error) {
+      console.error('Failed to fetch orders:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   if (!user) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -100,6 +117,15 @@ export default function Orders() {
                 </div>
               </motion.div>
             ))}
+            {nextCursor && (
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="w-full py-3 rounded-lg border border-gray-300 dark:border-gray-600 font-semibold hover:border-primary transition disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more orders'}
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -79,6 +79,9 @@ export const orderAPI = {
   create: (items: any[], paymentMethod: string, shippingAddress: string) =>
     apiClient.post('/orders', { items, payment_method: paymentMethod, shipping_address: shippingAddress }),
   getAll: () => apiClient.get('/orders'),
+  // Newest first; pass the previous page's next_cursor to get older orders
+  getPage: (cursor: string = '', limit: number = 10) =>
+    apiClient.get('/orders', { params: { cursor, limit } }),
   getById: (id: string) => apiClient.get(`/orders/${id}`),
   updateStatus: (id: string, status: string) =>
     apiClient.patch(`/orders/${id}`, { status })